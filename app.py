@@ -1,96 +1,315 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory, abort
+from flask import Flask, Response, request, jsonify, abort
+import click
+import csv
+from flask.cli import AppGroup
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt, get_jwt_identity
 from datetime import datetime, timedelta, timezone
-import bcrypt
+import hashlib
+import itertools
 import os
 from dotenv import load_dotenv
 from bson.objectid import ObjectId
-from config import Config, get_database, init_db
-from icalendar import Calendar, Event
-from io import BytesIO
+from config import Config, ensure_indexes, get_database, get_pool_stats, init_db, ping_database
+from archival import ARCHIVE_COLLECTION, archive_bookings, archive_cutoff
+from availability import AvailabilityIndex, MAX_AVAILABILITY_DAYS, encode_rle
+from caching import TTLCache, make_cache
+from bulk_import import import_bookings, parse_rows, summarize_report
+from catalog import AssetCatalog, hall_seats
+from jobs import JobQueue, job_summary
+from live import ChangeStreamFeed, EventBus, booking_event, live_updates_enabled, sse_stream
+from migrations import migrate_typed_dates
+from notifications import decision_email, send_email
+import compression
+import metrics
+from assets import send_page, send_static
+from passwords import HasherBusy, PasswordHasher
+from ics_export import ICS_BATCH_SIZE, ICS_PROJECTION, iter_calendar, parse_object_ids
+from pagination import (
+    SORT_ORDER, STREAM_BATCH_SIZE, after_cursor, encode_cursor, merge_sorted, parse_fields,
+    parse_limit
+)
+from serialization import FastJSONProvider, calendar_days, dumps
+from scheduling import (
+    MAX_BOOKING_DAYS, SLOT_PARTS, booking_cells, booking_range, claim_slots, conflict_message,
+    ends_on_or_after, find_conflict, format_date, normalize_recurrence, occurrence_dates,
+    overlap_clauses, parse_date, parse_request_range, release_slots, reserve_booking, slot_mask
+)
+from pymongo import ReturnDocument, UpdateOne
 
 load_dotenv()
 
+# /static is served by serve_static() (assets.py), not Flask's built-in
+# static route, so precompressed and fingerprinted files get used
 app = Flask(
     __name__,
-    static_folder=os.path.join(os.path.dirname(__file__), 'static'),
-    static_url_path='/static',
+    static_folder=None,
     template_folder=os.path.join(os.path.dirname(__file__), 'templates')
 )
 
 app.config.from_object(Config)
+app.json = FastJSONProvider(app)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
 jwt = JWTManager(app)
+metrics.init_app(app)
+metrics.command_metrics.slow_ms = Config.SLOW_QUERY_MS
+if Config.COMPRESS_RESPONSES:
+    compression.init_app(app, min_size=Config.COMPRESS_MIN_BYTES, gzip_level=Config.COMPRESS_GZIP_LEVEL,
+                         brotli_quality=Config.COMPRESS_BROTLI_QUALITY)
 IST = timezone(timedelta(hours=5, minutes=30))
 
 def get_ist_now():
     return datetime.now(IST)
 
-try:
-    init_db()
-    print("✅ MongoDB Atlas connected!")
-except Exception as e:
-    print(f"❌ MongoDB connection error: {e}")
+availability_index = AvailabilityIndex(get_database, refresh_seconds=Config.AVAILABILITY_REFRESH_SECONDS, tz=IST)
+password_hasher = PasswordHasher(
+    rounds=Config.BCRYPT_ROUNDS,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING
+)
+stats_cache = TTLCache(ttl=Config.STATS_CACHE_SECONDS, maxsize=16)
+archive_stats_cache = TTLCache(ttl=Config.ARCHIVE_STATS_CACHE_SECONDS, maxsize=4)
+calendar_feed_cache = TTLCache(ttl=Config.CALENDAR_CACHE_SECONDS, maxsize=64)
+asset_catalog = AssetCatalog(
+    get_database,
+    make_cache(Config.CATALOG_CACHE_SECONDS, maxsize=4, namespace='catalog', url=Config.CACHE_URL)
+)
 
-def is_admin():
-    identity = get_jwt_identity()
-    if not identity:
-        return False
+live_bus = EventBus(size=Config.LIVE_BUFFER_SIZE)
+
+def refresh_derived(booking):
+    availability_index.apply(booking)
+    stats_cache.clear()
+    calendar_feed_cache.delete(booking.get('hall'))
+
+def remote_booking_changed(booking):
+    # From the change stream: a write by any worker, this one included
+    refresh_derived(booking)
+    live_bus.publish(booking_event(booking))
+
+change_feed = ChangeStreamFeed(get_database, on_change=remote_booking_changed)
+
+def booking_changed(booking):
+    # Every booking write goes through here to keep derived views fresh.
+    # With a change stream the delta is published when it comes back
+    # through the stream, otherwise straight away (this worker only).
+    refresh_derived(booking)
+    if not change_feed.active:
+        live_bus.publish(booking_event(booking))
+
+# =============== BACKGROUND JOBS ===============
+job_queue = JobQueue(
+    get_database,
+    workers=Config.JOB_WORKERS,
+    durable=Config.JOB_QUEUE_DURABLE,
+    max_attempts=Config.JOB_MAX_ATTEMPTS,
+    backoff=Config.JOB_BACKOFF_SECONDS
+)
+# Downloadable job results: job name -> (mimetype, filename)
+JOB_RESULT_TYPES = {'export_ics': ('text/calendar', 'ciet_bookings.ics')}
+
+@job_queue.task('notify_decision')
+def notify_decision_job(booking_id, status):
+    db = get_database()
+    booking = db['bookings'].find_one({'_id': ObjectId(booking_id)})
+    if not booking or booking.get('status') != status:
+        return None  # deleted or decided again since; that decision sends its own mail
+    user = db['users'].find_one({'username': booking.get('createdBy')}, {'username': 1, 'email': 1, 'full_name': 1})
+    if not user or not user.get('email'):
+        return None
+    subject, body = decision_email(booking, user)
+    send_email(user['email'], subject, body)
+    return None
+
+@job_queue.task('export_ics')
+def export_ics_job(booking_ids):
+    cursor = get_database()['bookings'].find(
+        {'_id': {'$in': parse_object_ids(booking_ids)}}, ICS_PROJECTION
+    ).sort('_id', 1).batch_size(ICS_BATCH_SIZE)
+    body = b''.join(iter_calendar(cursor, 'CIET Hall Bookings', get_ist_now()))
+    if len(body) > Config.JOB_RESULT_MAX_BYTES:
+        raise ValueError('Export too large, select fewer bookings')
+    return body
+
+# Every worker ticks, but archive_bookings() only lets one scheduled run
+# through per ARCHIVE_INTERVAL_HOURS across all of them (shared lock and
+# next-run time in MongoDB); the rest find it taken or not yet due
+ARCHIVE_TICK_SECONDS = 300
+
+@job_queue.task('archive_bookings')
+def archive_bookings_job():
+    interval = Config.ARCHIVE_INTERVAL_HOURS * 3600
+    try:
+        stats = run_archival(progress=lambda message: None, every_seconds=interval)
+        if stats['archived']:
+            print(f"🗄️ Archived {stats['archived']} bookings, {stats['remaining']} remaining")
+    finally:
+        # Re-arms itself; skipped when another worker already queued the next tick
+        schedule_archival(delay=min(interval, ARCHIVE_TICK_SECONDS))
+
+def run_archival(batch_size=None, limit=None, pause=0.0, days=None, progress=print, every_seconds=None):
     db = get_database()
-    user = db['users'].find_one({'username': identity})
-    return user and user.get('role') == 'administrator'
+    cutoff = archive_cutoff(Config.ARCHIVE_AFTER_DAYS if days is None else days, get_ist_now())
+    stats = archive_bookings(db, cutoff, batch_size=batch_size or Config.ARCHIVE_BATCH_SIZE,
+                             pause=pause, limit=limit, progress=progress, every_seconds=every_seconds)
+    if stats['archived']:
+        stats_cache.clear()
+    return stats
+
+def schedule_archival(delay):
+    try:
+        if not job_queue.pending('archive_bookings'):
+            job_queue.enqueue('archive_bookings', delay=delay)
+    except Exception as e:
+        print(f"❌ Could not schedule archival: {e}")
+
+archival_scheduled = False
+
+@app.before_request
+def start_archival():
+    # Once per worker, on its first request, so importing the app stays
+    # offline (see the CLI section)
+    global archival_scheduled
+    if archival_scheduled or Config.ARCHIVE_INTERVAL_HOURS <= 0:
+        return
+    archival_scheduled = True
+    schedule_archival(delay=60)
+
+def notify_decisions(bookings):
+    # Mail the requesters in the background, queued in one write; never
+    # fails the decisions themselves
+    try:
+        job_queue.enqueue_many('notify_decision', [
+            {'booking_id': str(booking['_id']), 'status': booking['status']} for booking in bookings
+        ])
+    except Exception as e:
+        print(f"❌ Could not queue notifications for {len(bookings)} bookings: {e}")
+
+# username -> {'role', 'tokenVersion'}; dropped on password reset so the
+# change is seen immediately in this worker and within the TTL elsewhere.
+# A role changed in the database revokes tokens carrying the old role
+# within the same TTL.
+user_auth_cache = TTLCache(ttl=Config.ROLE_CACHE_SECONDS, maxsize=4096)
+
+def get_user_auth(username):
+    auth = user_auth_cache.get(username)
+    if auth is None:
+        user = get_database()['users'].find_one({'username': username}, {'role': 1, 'tokenVersion': 1})
+        if not user:
+            return None
+        auth = {'role': user.get('role'), 'tokenVersion': user.get('tokenVersion', 0)}
+        user_auth_cache.set(username, auth)
+    return auth
+
+def issue_token(user):
+    # Role and token version ride along in the JWT so role checks need no lookup
+    claims = {'role': user.get('role'), 'ver': user.get('tokenVersion', 0)}
+    return create_access_token(identity=user['username'], additional_claims=claims, expires_delta=timedelta(days=30))
+
+@jwt.token_in_blocklist_loader
+def token_revoked(jwt_header, jwt_payload):
+    # Tokens issued before a password reset carry a stale version, tokens
+    # issued before a role change a stale role
+    auth = get_user_auth(jwt_payload['sub'])
+    if auth is None or jwt_payload.get('ver', 0) != auth['tokenVersion']:
+        return True
+    return 'role' in jwt_payload and jwt_payload['role'] != auth['role']
+
+def current_role():
+    claims = get_jwt()
+    if 'role' in claims:
+        return claims['role']
+    # Tokens issued before roles were embedded
+    identity = get_jwt_identity()
+    auth = get_user_auth(identity) if identity else None
+    return auth and auth['role']
+
+def is_admin():
+    return current_role() == 'administrator'
+
+def can_decide():
+    return current_role() in ('principal', 'administrator')
 
 
 # ==================== STATIC FILE ROUTES ====================
 @app.route('/')
 def index():
-    return send_from_directory('templates', 'index.html')
+    return send_page('index.html')
 
 @app.route('/admin.html')
 def admin_dashboard():
-    return send_from_directory('templates', 'admin.html')
+    return send_page('admin.html')
 
 @app.route('/index.html')
 def index_html():
-    return send_from_directory('templates', 'index.html')
+    return send_page('index.html')
 
 @app.route('/login.html')
 def login():
-    return send_from_directory('templates', 'login.html')
+    return send_page('login.html')
 
 @app.route('/signup.html')
 def signup():
-    return send_from_directory('templates', 'signup.html')
+    return send_page('signup.html')
 
 @app.route('/booking.html')
 def booking():
-    return send_from_directory('templates', 'booking.html')
+    return send_page('booking.html')
 
 @app.route('/staff.html')
 def staff():
-    return send_from_directory('templates', 'staff.html')
+    return send_page('staff.html')
 
 @app.route('/principal.html')
 def principal():
-    return send_from_directory('templates', 'principal.html')
+    return send_page('principal.html')
 
 @app.route('/availability.html')
 def availability():
-    return send_from_directory('templates', 'availability.html')
+    return send_page('availability.html')
 
 @app.route('/principal-availability.html')
 def principal_availability():
-    return send_from_directory('templates', 'principal-availability.html')
+    return send_page('principal-availability.html')
 
 @app.route('/static/<path:filename>')
 def serve_static(filename):
-    return send_from_directory('static', filename)
+    return send_static(filename)
 
 @app.route('/health')
 def health():
-    return jsonify({'status': 'ok', 'message': 'Server is running'})
+    # Ready only when MongoDB answers; load balancers use the 503
+    try:
+        ping_database()
+        database = 'ok'
+    except Exception as e:
+        database = str(e)
+    ready = database == 'ok'
+    return jsonify({
+        'status': 'ok' if ready else 'unavailable',
+        'message': 'Server is running' if ready else 'Database unavailable',
+        'database': database,
+        'pool': get_pool_stats(),
+        'password_hasher': password_hasher.stats()
+    }), 200 if ready else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    pool = get_pool_stats()
+    hasher = password_hasher.stats()
+    gauges = {
+        'ciet_mongo_pool_open_connections': ('Open sockets in this worker\'s Mongo pool', pool['open_connections']),
+        'ciet_mongo_pool_checked_out': ('Sockets currently checked out', pool['checked_out']),
+        'ciet_mongo_pool_checkouts_total': ('Pool checkouts since the client was created', pool['checkouts']),
+        'ciet_mongo_pool_wait_seconds_total': ('Total time spent waiting for a pooled socket', pool['wait_time_total_ms'] / 1000),
+        'ciet_password_hash_queue_depth': ('bcrypt jobs queued or running', hasher['queue_depth']),
+        'ciet_password_hash_rejected_total': ('bcrypt jobs refused because the pool was full', hasher['rejected']),
+        'ciet_live_subscribers': ('Open live availability streams', live_bus.stats()['subscribers']),
+        'ciet_jobs_queued': ('Background jobs waiting to run', job_queue.queued_count()),
+        'ciet_jobs_running': ('Background jobs running in this worker', job_queue.stats()['running'])
+    }
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
 
 
 # =============== AUTH ROUTES ===============
@@ -109,7 +328,7 @@ def user_signup():
             return jsonify({'message': 'Username already exists'}), 400
         if users.find_one({'email': data['email']}):
             return jsonify({'message': 'Email already exists'}), 400
-        hashed_pwd = bcrypt.hashpw(data['password'].encode(), bcrypt.gensalt())
+        hashed_pwd = password_hasher.hash(data['password'])
         user_doc = {
             'username': data['username'],
             'email': data['email'],
@@ -121,6 +340,8 @@ def user_signup():
         }
         users.insert_one(user_doc)
         return jsonify({'message': 'Account created successfully'}), 201
+    except HasherBusy as e:
+        return jsonify({'message': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         print(f"❌ Signup error: {e}")
         return jsonify({'message': str(e)}), 500
@@ -134,9 +355,15 @@ def user_login():
         db = get_database()
         users = db['users']
         user = users.find_one({'username': data['username']})
-        if not user or not bcrypt.checkpw(data['password'].encode(), user['password']):
+        if not user or not password_hasher.verify(data['password'], user['password']):
             return jsonify({'message': 'Invalid credentials'}), 401
-        token = create_access_token(identity=user['username'], expires_delta=timedelta(days=30))
+        if password_hasher.needs_rehash(user['password']):
+            # Old work factor: store a hash at the configured cost, off the request path
+            password_hasher.rehash_in_background(
+                data['password'],
+                lambda hashed: users.update_one({'_id': user['_id']}, {'$set': {'password': hashed}})
+            )
+        token = issue_token(user)
         return jsonify({
             'token': token,
             'username': user['username'],
@@ -145,6 +372,8 @@ def user_login():
             'department': user['department'],
             'role': user['role']
         }), 200
+    except HasherBusy as e:
+        return jsonify({'message': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         print(f"❌ Login error: {e}")
         return jsonify({'message': str(e)}), 500
@@ -153,11 +382,13 @@ def user_login():
 @app.route('/assets', methods=['GET'])
 @jwt_required()
 def list_assets():
-    db = get_database()
-    assets = list(db['assets'].find())
-    for a in assets:
-        a['_id'] = str(a['_id'])
-    return jsonify({'items': assets}), 200
+    # Served from the catalog cache as pre-serialized bytes
+    catalog = asset_catalog.entry()
+    response = Response(catalog['body'], mimetype='application/json')
+    response.set_etag(catalog['etag'])
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/assets', methods=['POST'])
 @jwt_required()
@@ -182,6 +413,7 @@ def create_asset():
         'image_url': image_url
     }
     result = assets.insert_one(asset_doc)
+    asset_catalog.invalidate()
     return jsonify({"message": "Asset created", "id": str(result.inserted_id)}), 201
 
 @app.route('/assets/<asset_id>', methods=['PUT'])
@@ -196,6 +428,7 @@ def update_asset(asset_id):
     result = assets.update_one({'_id': ObjectId(asset_id)}, {'$set': update_fields})
     if result.matched_count == 0:
         return jsonify({"message": "Asset not found"}), 404
+    asset_catalog.invalidate()
     return jsonify({"message": "Asset updated"}), 200
 
 @app.route('/assets/<asset_id>', methods=['DELETE'])
@@ -208,34 +441,40 @@ def delete_asset(asset_id):
     result = assets.delete_one({'_id': ObjectId(asset_id)})
     if result.deleted_count == 0:
         return jsonify({"message": "Asset not found"}), 404
+    asset_catalog.invalidate()
     return jsonify({"message": "Asset deleted"}), 200
 
+INITIAL_ASSETS = [
+    {
+        "name": "Auditorium",
+        "seats": 500,
+        "description": "Large events, ceremonies, and cultural programs",
+        "image_url": "/static/images/auditorium.png"
+    },
+    {
+        "name": "Seminar Hall",
+        "seats": 250,
+        "description": "Workshops, talks, seminars, and presentations",
+        "image_url": "/static/images/seminar.png"
+    },
+    {
+        "name": "Board Room",
+        "seats": 60,
+        "description": "Meetings, reviews, and administrative sessions",
+        "image_url": "/static/images/board.png"
+    }
+]
+
 def seed_assets():
+    # Upsert by name in one batch: re-running never duplicates or overwrites halls
     db = get_database()
-    assets = db['assets']
-    if assets.count_documents({}) == 0:
-        initial_assets = [
-            {
-                "name": "Auditorium",
-                "seats": 500,
-                "description": "Large events, ceremonies, and cultural programs",
-                "image_url": "/static/images/auditorium.png"
-            },
-            {
-                "name": "Seminar Hall",
-                "seats": 250,
-                "description": "Workshops, talks, seminars, and presentations",
-                "image_url": "/static/images/seminar.png"
-            },
-            {
-                "name": "Board Room",
-                "seats": 60,
-                "description": "Meetings, reviews, and administrative sessions",
-                "image_url": "/static/images/board.png"
-            }
-        ]
-        assets.insert_many(initial_assets)
-        print("✅ Seeded initial asset list.")
+    result = db['assets'].bulk_write([
+        UpdateOne({'name': asset['name']}, {'$setOnInsert': asset}, upsert=True)
+        for asset in INITIAL_ASSETS
+    ])
+    if result.upserted_count:
+        asset_catalog.invalidate()
+        print(f"✅ Seeded {result.upserted_count} initial assets.")
 
 # =============== BOOKING ROUTES ===============
 
@@ -248,68 +487,41 @@ def create_booking():
         current_user = get_jwt_identity()
         data = request.get_json()
         db = get_database()
-        bookings = db['bookings']
 
         # 1. Parse Inputs (Handle both single and multi-day logic)
         req_hall = data.get('hall')
         req_time = data.get('time')  # FN, AN, or Full
+        if req_time not in SLOT_PARTS:
+            return jsonify({'message': 'time must be FN, AN or Full'}), 400
+
+        # Hall must exist and hold the requested seats (cached catalog, no query)
+        invalid = asset_catalog.validate_booking(req_hall, data.get('seats'))
+        if invalid:
+            return jsonify({'message': invalid}), 400
 
         # Support legacy 'date' field or new 'fromDate'/'toDate'
-        if data.get('fromDate') and data.get('toDate'):
-            req_from = datetime.strptime(data.get('fromDate'), '%Y-%m-%d')
-            req_to = datetime.strptime(data.get('toDate'), '%Y-%m-%d')
-        else:
-            # Fallback for single day (or legacy requests)
-            single_date = datetime.strptime(data.get('date'), '%Y-%m-%d')
-            req_from = single_date
-            req_to = single_date
+        req_from, req_to = parse_request_range(data)
 
-        if req_to < req_from:
+        # Recurring series: fromDate is the first occurrence, recurrence.until
+        # the last possible one; stored as a single document
+        recurrence = None
+        if data.get('recurrence'):
+            recurrence = normalize_recurrence(data['recurrence'], req_from)
+            occurrences = list(occurrence_dates({'recurrence': recurrence}))
+            if not occurrences:
+                return jsonify({'message': 'Recurrence has no occurrences'}), 400
+            req_from, req_to = occurrences[0], occurrences[-1]
+        elif req_to < req_from:
             return jsonify({'message': 'To Date cannot be before From Date'}), 400
+        elif (req_to - req_from).days >= MAX_BOOKING_DAYS:
+            return jsonify({'message': f'A booking cannot span more than {MAX_BOOKING_DAYS} days'}), 400
 
-        # 2. Advanced Conflict Check
-        # Fetch all active bookings for this hall to check overlaps in Python
-        existing_bookings = list(bookings.find({
-            'hall': req_hall,
-            'status': {'$in': ['Pending', 'Approved']}
-        }))
-
-        for b in existing_bookings:
-            # A. Determine Date Range of existing booking
-            if 'fromDate' in b and 'toDate' in b:
-                # It's a multi-day booking
-                b_from = datetime.strptime(b['fromDate'], '%Y-%m-%d')
-                b_to = datetime.strptime(b['toDate'], '%Y-%m-%d')
-            else:
-                # It's a legacy single-day booking
-                b_from = datetime.strptime(b['date'], '%Y-%m-%d')
-                b_to = b_from
-
-            # B. Check Date Overlap
-            # Logic: (StartA <= EndB) and (EndA >= StartB)
-            date_overlap = (req_from <= b_to) and (req_to >= b_from)
-
-            if date_overlap:
-                # C. Check Time Overlap (only if dates overlap)
-                b_time = b.get('time')
-                time_conflict = False
-
-                if req_time == 'Full' or b_time == 'Full':
-                    time_conflict = True
-                elif req_time == b_time:
-                    time_conflict = True
-
-                if time_conflict:
-                    return jsonify({
-                        'message': f'Conflict detected! Hall is already booked from {b_from.date()} to {b_to.date()} ({b_time}).'
-                    }), 400
-
-        # 3. Create Booking Document
+        # 2. Create Booking Document
         booking_doc = {
             'hall': req_hall,
-            'date': data.get('fromDate'), # Keep 'date' as start date for sorting/legacy compatibility
-            'fromDate': data.get('fromDate'),
-            'toDate': data.get('toDate'),
+            'date': format_date(req_from), # Keep 'date' as start date for sorting/legacy compatibility
+            'fromDate': format_date(req_from),
+            'toDate': format_date(req_to),
             'time': req_time,
             'department': data.get('dept'),
             'hod': data.get('hod'),
@@ -320,26 +532,80 @@ def create_booking():
             'status': 'Pending',
             'createdAt': get_ist_now()
         }
+        if recurrence:
+            booking_doc['recurrence'] = recurrence
 
-        result = bookings.insert_one(booking_doc)
-        return jsonify({'message': 'Booking created', 'id': str(result.inserted_id)}), 201
+        # 3. Conflict check + atomic slot reservation + insert
+        booking_id, conflict = reserve_booking(db, booking_doc, req_from, req_to)
+        if conflict:
+            return jsonify({'message': conflict}), 400
+        booking_changed(booking_doc)
+        return jsonify({'message': 'Booking created', 'id': str(booking_id)}), 201
 
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         print(f"❌ Booking error: {e}")
         return jsonify({'message': str(e)}), 500
 
+def list_bookings_response(query, default_limit=None):
+    # Shared by /bookings and /public/bookings:
+    #   ?limit=&cursor=       keyset pages on (createdAt, _id), newest first
+    #   ?fields=a,b           projection
+    #   ?format=ndjson        stream one JSON document per line from the cursor
+    #   ?include_archived=1   also bookings moved to bookings_archive
+    args = request.args
+    projection = parse_fields(args.get('fields'))
+    limit = parse_limit(args.get('limit'), default=default_limit)
+    if args.get('cursor'):
+        query = {'$and': [query, after_cursor(args['cursor'])]}
+
+    db = get_database()
+    cursors = [db['bookings'].find(query, projection).sort(SORT_ORDER)]
+    if args.get('include_archived') in ('1', 'true'):
+        # Same query and order on both collections, merged; the keyset
+        # cursor works across the two unchanged
+        cursors.append(db[ARCHIVE_COLLECTION].find(query, projection).sort(SORT_ORDER))
+
+    if args.get('format') == 'ndjson':
+        if limit:
+            cursors = [c.limit(limit) for c in cursors]
+        cursors = [c.batch_size(STREAM_BATCH_SIZE) for c in cursors]
+        cursor = map(calendar_days, merge_sorted(*cursors))
+        if limit:
+            cursor = itertools.islice(cursor, limit)
+
+        def generate():
+            for doc in cursor:
+                yield dumps(doc) + b'\n'
+
+        return Response(generate(), mimetype='application/x-ndjson')
+
+    # Documents go to the encoder as the driver returns them; it handles
+    # ObjectId and datetime itself (start/end become calendar days)
+    if limit is None:
+        # Unpaginated (dashboard pages that still expect the full list)
+        return jsonify({'items': list(map(calendar_days, merge_sorted(*cursors)))}), 200
+
+    # Fetch one extra document to know whether another page exists
+    cursors = [c.limit(limit + 1) for c in cursors]
+    items = list(map(calendar_days, itertools.islice(merge_sorted(*cursors), limit + 1)))
+    next_cursor = encode_cursor(items[limit - 1]) if len(items) > limit else None
+    return jsonify({'items': items[:limit], 'next_cursor': next_cursor}), 200
+
 # Authenticated: dashboard/data-table use, filtering
 @app.route('/bookings', methods=['GET'])
 @jwt_required()
 def get_bookings():
     try:
-        db = get_database()
-        bookings = db['bookings']
         hall = request.args.get('hall')
         date = request.args.get('date')
         time = request.args.get('time')
         created_by = request.args.get('createdBy')
         status = request.args.get('status')
+        department = request.args.get('department')
+        from_date = request.args.get('from')
+        to_date = request.args.get('to')
         query = {}
         if hall:
             query['hall'] = hall
@@ -351,45 +617,219 @@ def get_bookings():
             query['createdBy'] = created_by
         if status:
             query['status'] = status
-        items = list(bookings.find(query))
-        for item in items:
-            item['_id'] = str(item['_id'])
-        return jsonify({'items': items}), 200
+        if department:
+            query['department'] = department
+        if from_date or to_date:
+            # Bookings overlapping [from, to] (reports), series included
+            range_from = parse_date(from_date) if from_date else datetime(1970, 1, 1)
+            range_to = parse_date(to_date) if to_date else datetime(9999, 12, 31)
+            query['$or'] = overlap_clauses(range_from, range_to)
+        return list_bookings_response(query)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         print(f"❌ Get bookings error: {e}")
         return jsonify({'message': str(e)}), 500
 
-# PUBLIC: (for index.html, etc): Just show Approved bookings, no login
+# PUBLIC: (for index.html, etc): Just show Approved bookings, no login.
+# Always paginated so an anonymous caller can't pull the whole collection.
 @app.route('/public/bookings', methods=['GET'])
 def get_bookings_public():
     try:
-        db = get_database()
-        bookings = db['bookings']
         status = request.args.get('status')
         if status:
             query = {'status': status}
         else:
             query = {'status': 'Approved'}
-        items = list(bookings.find(query))
-        for item in items:
-            item['_id'] = str(item['_id'])
-        return jsonify({'items': items}), 200
+        from_date = request.args.get('from')
+        if from_date:
+            query['date'] = {'$gte': from_date}
+        return list_bookings_response(query, default_limit=Config.PUBLIC_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
     except Exception as e:
         print(f"❌ Get bookings error: {e}")
         return jsonify({'message': str(e)}), 500
 
+# Compact per-day occupancy for the availability calendar. Each day is one
+# hex digit: bits 0-1 are Pending FN/AN, bits 2-3 are Approved FN/AN.
+@app.route('/availability', methods=['GET'])
+@jwt_required()
+def get_availability():
+    try:
+        hall = request.args.get('hall')
+        if not hall:
+            return jsonify({'message': 'hall is required'}), 400
+        from_arg = request.args.get('from')
+        start = datetime.strptime(from_arg, '%Y-%m-%d') if from_arg else datetime.now(IST).replace(tzinfo=None)
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        days = min(max(int(request.args.get('days', 60)), 1), MAX_AVAILABILITY_DAYS)
+        codes = availability_index.day_codes(hall, start, days)
+        payload = {'hall': hall, 'from': format_date(start), 'days': days}
+        if request.args.get('encoding') == 'rle':
+            payload['runs'] = encode_rle(codes)
+        else:
+            payload['bitmap'] = ''.join(format(code, 'x') for code in codes)
+        return jsonify(payload), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Availability error: {e}")
+        return jsonify({'message': str(e)}), 500
+
+# Halls with room for ?seats= that are free for ?slot= (FN, AN or Full)
+# somewhere between ?from= and ?to=, earliest free day first. Answered
+# from the asset catalog and the in-memory availability index: no queries.
+@app.route('/search/free-slots', methods=['GET'])
+@jwt_required()
+def search_free_slots():
+    try:
+        args = request.args
+        seats = int(args.get('seats') or 1)
+        slot = args.get('slot') or 'Full'
+        if slot not in SLOT_PARTS:
+            return jsonify({'message': 'slot must be FN, AN or Full'}), 400
+        today = datetime.now(IST).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        # The index only holds bookings from today on, so the window can't start earlier
+        start = max(parse_date(args['from']) if args.get('from') else today, today)
+        end = parse_date(args['to']) if args.get('to') else start
+        if end < start:
+            return jsonify({'message': 'to cannot be before from (or today)'}), 400
+        days = (end - start).days + 1
+        if days > MAX_AVAILABILITY_DAYS:
+            return jsonify({'message': f'Search at most {MAX_AVAILABILITY_DAYS} days at a time'}), 400
+
+        halls = {name: asset for name, asset in asset_catalog.entry()['halls'].items()
+                 if (hall_seats(asset) or 0) >= seats}
+        free = availability_index.free_days(halls, start, days, slot_mask(slot))
+        results = []
+        for name, offsets in free.items():
+            if not offsets:
+                continue
+            asset = halls[name]
+            results.append({
+                'hall': name,
+                'seats': hall_seats(asset),
+                'image_url': asset.get('image_url', ''),
+                'firstFree': format_date(start + timedelta(days=offsets[0])),
+                'freeDates': [format_date(start + timedelta(days=i)) for i in offsets],
+                'fullyFree': len(offsets) == days
+            })
+        # Earliest free day, then the smallest hall that fits
+        results.sort(key=lambda r: (r['firstFree'], r['seats'], r['hall']))
+        return jsonify({
+            'from': format_date(start), 'to': format_date(end), 'slot': slot, 'seats': seats,
+            'results': results
+        }), 200
+    except ValueError as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Free slot search error: {e}")
+        return jsonify({'message': str(e)}), 500
+
+def booking_facets(collection):
+    # One aggregation round trip for every dashboard counter and breakdown
+    since = (datetime.now(IST) - timedelta(days=365)).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    facets = {
+        'status': [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}],
+        'halls': [{'$group': {'_id': {'hall': '$hall', 'status': '$status'}, 'count': {'$sum': 1}}}],
+        'departments': [{'$group': {'_id': {'department': '$department', 'status': '$status'}, 'count': {'$sum': 1}}}],
+        'months': [
+            {'$match': {'createdAt': {'$gte': since}}},
+            {'$group': {
+                '_id': {'month': {'$dateToString': {'format': '%Y-%m', 'date': '$createdAt', 'timezone': '+05:30'}},
+                        'status': '$status'},
+                'count': {'$sum': 1}
+            }}
+        ]
+    }
+    return next(collection.aggregate([{'$facet': facets}]), {})
+
+def booking_stats(db):
+    # Hot and archived bookings together. The archive only changes when
+    # archival runs, so its facets are cached under its document count
+    hot = booking_facets(db['bookings'])
+    archive = db[ARCHIVE_COLLECTION]
+    archived_count = archive.estimated_document_count()
+    archived = archive_stats_cache.get_or_set(
+        archived_count, lambda: booking_facets(archive) if archived_count else {}
+    )
+
+    def rows(name):
+        return hot.get(name, []) + archived.get(name, [])
+
+    def breakdown(rows, key):
+        grouped = {}
+        for row in rows:
+            name = row['_id'].get(key) or 'Unknown'
+            entry = grouped.setdefault(name, {key: name, 'total': 0})
+            status = row['_id'].get('status') or 'Unknown'
+            entry[status] = entry.get(status, 0) + row['count']
+            entry['total'] += row['count']
+        return sorted(grouped.values(), key=lambda e: e[key])
+
+    status_counts = {}
+    for row in rows('status'):
+        status = row['_id'] or 'Unknown'
+        status_counts[status] = status_counts.get(status, 0) + row['count']
+    return {
+        'total': sum(status_counts.values()),
+        'archived': archived_count,
+        'status': {name: status_counts.get(name, 0) for name in ['Pending', 'Approved', 'Rejected']},
+        'halls': breakdown(rows('halls'), 'hall'),
+        'departments': breakdown(rows('departments'), 'department'),
+        'months': breakdown(rows('months'), 'month'),
+        'generatedAt': get_ist_now().isoformat()
+    }
+
+# Dashboard counters and breakdowns (archived bookings included), cached
+# for STATS_CACHE_SECONDS and dropped on every booking write in this worker
+@app.route('/stats', methods=['GET'])
+@jwt_required()
+def get_stats():
+    try:
+        stats = stats_cache.get_or_set('bookings', lambda: booking_stats(get_database()))
+        return jsonify(stats), 200
+    except Exception as e:
+        print(f"❌ Stats error: {e}")
+        return jsonify({'message': str(e)}), 500
+
 @app.route('/approve/<booking_id>', methods=['POST'])
 @jwt_required()
 def approve_booking(booking_id):
+    if not can_decide():
+        return jsonify({'message': 'Principal only'}), 403
     try:
         db = get_database()
         bookings = db['bookings']
-        result = bookings.update_one(
-            {'_id': ObjectId(booking_id)},
-            {'$set': {'status': 'Approved', 'approvedAt': get_ist_now()}}
-        )
-        if result.matched_count == 0:
+        booking = bookings.find_one({'_id': ObjectId(booking_id)})
+        if not booking:
             return jsonify({'message': 'Booking not found'}), 404
+        # Bookings from before slot claims can still overlap an approved one;
+        # checked first so a 409 here never leaves claims behind
+        b_from, b_to = booking_range(booking)
+        approved = find_conflict(bookings, booking['hall'], b_from, b_to, booking.get('time'),
+                                 exclude_id=booking['_id'], statuses=['Approved'], request=booking)
+        if approved:
+            return jsonify({'message': conflict_message(approved)}), 409
+        # Re-claim the slots (no-op if the booking still holds them, e.g. it
+        # was Pending); fails if it was Rejected and someone took the slot
+        held = db['slot_claims'].find_one({'bookingId': booking['_id']}, {'_id': 1}) is not None
+        taken = claim_slots(db, booking)
+        if taken:
+            return jsonify({'message': f"Conflict detected! Hall is already booked on {taken['date']} ({taken['slot']})."}), 409
+        try:
+            bookings.update_one(
+                {'_id': booking['_id']},
+                {'$set': {'status': 'Approved', 'approvedAt': get_ist_now()}}
+            )
+        except Exception:
+            if not held:
+                release_slots(db, booking['_id'])
+            raise
+        booking['status'] = 'Approved'
+        booking_changed(booking)
+        notify_decisions([booking])
         return jsonify({'message': 'Booking approved'}), 200
     except Exception as e:
         print(f"❌ Approve error: {e}")
@@ -398,20 +838,253 @@ def approve_booking(booking_id):
 @app.route('/reject/<booking_id>', methods=['POST'])
 @jwt_required()
 def reject_booking(booking_id):
+    if not can_decide():
+        return jsonify({'message': 'Principal only'}), 403
     try:
         db = get_database()
         bookings = db['bookings']
-        result = bookings.update_one(
+        booking = bookings.find_one_and_update(
             {'_id': ObjectId(booking_id)},
-            {'$set': {'status': 'Rejected', 'approvedAt': get_ist_now()}}
+            {'$set': {'status': 'Rejected', 'approvedAt': get_ist_now()}},
+            return_document=ReturnDocument.AFTER
         )
-        if result.matched_count == 0:
+        if not booking:
             return jsonify({'message': 'Booking not found'}), 404
+        release_slots(db, booking['_id'])
+        booking_changed(booking)
+        notify_decisions([booking])
         return jsonify({'message': 'Booking rejected'}), 200
     except Exception as e:
         print(f"❌ Reject error: {e}")
         return jsonify({'message': str(e)}), 500
 
+def apply_decisions(db, decisions):
+    bookings = db['bookings']
+    results = [None] * len(decisions)
+    wanted = {}
+    # Every item is validated before anything is written
+    for i, decision in enumerate(decisions):
+        if not isinstance(decision, dict):
+            results[i] = {'id': None, 'status': 'error', 'message': 'Each decision must be an object'}
+            continue
+        action = decision.get('action')
+        try:
+            # ObjectId(None) would mint a new id instead of failing
+            if not isinstance(decision.get('id'), str):
+                raise ValueError
+            booking_id = ObjectId(decision['id'])
+        except Exception:
+            results[i] = {'id': decision.get('id'), 'status': 'error', 'message': 'Invalid booking id'}
+            continue
+        if action not in ('approve', 'reject'):
+            results[i] = {'id': str(booking_id), 'status': 'error', 'message': 'action must be approve or reject'}
+            continue
+        if booking_id in wanted:
+            results[i] = {'id': str(booking_id), 'status': 'error',
+                          'message': f'Duplicate decision (see item {wanted[booking_id][0] + 1})'}
+            continue
+        wanted[booking_id] = (i, action)
+
+    # 1. Every referenced booking in one query
+    found = {b['_id']: b for b in bookings.find({'_id': {'$in': list(wanted)}})}
+    approvals, rejections = [], []
+    for booking_id, (i, action) in wanted.items():
+        booking = found.get(booking_id)
+        if not booking:
+            results[i] = {'id': str(booking_id), 'status': 'error', 'message': 'Booking not found'}
+        elif action == 'approve':
+            approvals.append(booking)
+        else:
+            rejections.append(booking)
+
+    # 2. Approved occupancy over the span of all approvals, in one query
+    rejected_ids = [b['_id'] for b in rejections]
+    occupied = set()
+    if approvals:
+        span_from = min(booking_range(b)[0] for b in approvals)
+        span_to = max(booking_range(b)[1] for b in approvals)
+        approved = bookings.find({
+            'hall': {'$in': list({b['hall'] for b in approvals})},
+            'status': 'Approved',
+            '_id': {'$nin': rejected_ids + [b['_id'] for b in approvals]},
+            '$or': overlap_clauses(span_from, span_to)
+        }, {'hall': 1, 'start': 1, 'end': 1, 'date': 1, 'fromDate': 1, 'toDate': 1, 'time': 1, 'recurrence': 1})
+        for b in approved:
+            occupied.update(booking_cells(b))
+
+    # 3. Single pass over approvals, earliest request first
+    now = get_ist_now()
+    holding = {c['bookingId'] for c in db['slot_claims'].find(
+        {'bookingId': {'$in': [b['_id'] for b in approvals]}}, {'bookingId': 1})}
+    operations, changed = [], []
+    for booking in sorted(approvals, key=lambda b: (b.get('createdAt') or datetime.max, b['_id'])):
+        i = wanted[booking['_id']][0]
+        cells = booking_cells(booking)
+        clash = next((cell for cell in cells if cell in occupied), None)
+        if clash is None and booking['_id'] not in holding:
+            # Was Rejected: its slots may have been claimed since
+            taken = claim_slots(db, booking)
+            if taken:
+                clash = (taken['hall'], taken['date'], taken['slot'])
+        if clash:
+            results[i] = {'id': str(booking['_id']), 'status': 'conflict',
+                          'message': f'Conflict detected! Hall is already booked on {clash[1]} ({clash[2]}).'}
+            continue
+        occupied.update(cells)
+        operations.append(UpdateOne({'_id': booking['_id']}, {'$set': {'status': 'Approved', 'approvedAt': now}}))
+        booking['status'] = 'Approved'
+        changed.append(booking)
+        results[i] = {'id': str(booking['_id']), 'status': 'approved'}
+
+    for booking in rejections:
+        operations.append(UpdateOne({'_id': booking['_id']}, {'$set': {'status': 'Rejected', 'approvedAt': now}}))
+        booking['status'] = 'Rejected'
+        changed.append(booking)
+        results[wanted[booking['_id']][0]] = {'id': str(booking['_id']), 'status': 'rejected'}
+
+    # 4. One bulk write for every decision, one delete for released claims
+    if operations:
+        bookings.bulk_write(operations, ordered=False)
+    if rejected_ids:
+        db['slot_claims'].delete_many({'bookingId': {'$in': rejected_ids}})
+    for booking in changed:
+        booking_changed(booking)
+    notify_decisions(changed)
+    return results
+
+# Approve/reject many bookings in one round trip:
+#   {"decisions": [{"id": "...", "action": "approve"}, ...]}
+# Approvals are re-checked against already approved bookings (and each
+# other) so two overlapping requests can't both end up Approved.
+@app.route('/bookings/decisions', methods=['POST'])
+@jwt_required()
+def decide_bookings():
+    if not can_decide():
+        return jsonify({'message': 'Principal only'}), 403
+    try:
+        data = request.get_json() or {}
+        if not isinstance(data, dict):
+            return jsonify({'message': 'Request body must be a JSON object'}), 400
+        decisions = data.get('decisions') or []
+        if not isinstance(decisions, list):
+            return jsonify({'message': 'decisions must be a list'}), 400
+        if not decisions:
+            return jsonify({'message': 'No decisions provided'}), 400
+        if len(decisions) > Config.MAX_DECISIONS_PER_REQUEST:
+            return jsonify({'message': f'At most {Config.MAX_DECISIONS_PER_REQUEST} decisions per request'}), 400
+        results = apply_decisions(get_database(), decisions)
+        summary = {}
+        for result in results:
+            summary[result['status']] = summary.get(result['status'], 0) + 1
+        return jsonify({'results': results, 'summary': summary}), 200
+    except Exception as e:
+        print(f"❌ Decisions error: {e}")
+        return jsonify({'message': str(e)}), 500
+
+def run_import(rows, created_by, status, dry_run):
+    if len(rows) > Config.MAX_IMPORT_ROWS:
+        raise ValueError(f'At most {Config.MAX_IMPORT_ROWS} rows per import')
+    report, created = import_bookings(
+        get_database(), rows, created_by, get_ist_now(), asset_catalog.validate_booking,
+        status=status, dry_run=dry_run
+    )
+    for booking in created:
+        booking_changed(booking)
+    return report
+
+# Semester timetables in one request. Body is CSV (text/csv, or a
+# multipart 'file') with a header row, or JSON {"rows": [...]}; columns
+# match POST /book (hall, fromDate, toDate, time, dept, hod, purpose,
+# seats, details). ?status=Approved imports pre-approved, ?dryRun=1 only
+# reports. Rows are checked against existing bookings and each other.
+@app.route('/bookings/import', methods=['POST'])
+@jwt_required()
+def import_bookings_route():
+    if not can_decide():
+        return jsonify({'message': 'Principal only'}), 403
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            fmt = 'json' if upload.filename.endswith('.json') else 'csv'
+            rows = parse_rows(upload.read().decode('utf-8-sig'), fmt)
+        elif request.mimetype == 'text/csv':
+            rows = parse_rows(request.get_data(as_text=True), 'csv')
+        else:
+            rows = parse_rows(request.get_json() or {}, 'json')
+        if not rows:
+            return jsonify({'message': 'No rows provided'}), 400
+        report = run_import(
+            rows, get_jwt_identity(),
+            status=request.args.get('status', 'Pending'),
+            dry_run=request.args.get('dryRun') in ('1', 'true')
+        )
+        return jsonify({'summary': summarize_report(report), 'rows': report}), 200
+    except (ValueError, csv.Error) as e:
+        return jsonify({'message': str(e)}), 400
+    except Exception as e:
+        print(f"❌ Import error: {e}")
+        return jsonify({'message': str(e)}), 500
+
+# =============== LIVE AVAILABILITY ===============
+# Server-Sent Events: one 'booking' event per occupancy change
+#   data: {"id": 7, "booking": "...", "hall": "Auditorium", "from": "2026-03-02",
+#          "to": "2026-03-02", "slot": "FN", "status": "Approved"}
+# Public like /public/bookings (no personal fields), so EventSource can
+# connect without an Authorization header. Only streams under ASYNC_MODE=1
+# (see LIVE_UPDATES), where each idle stream is a parked greenlet.
+@app.route('/live/availability', methods=['GET'])
+def live_availability():
+    # 204 tells EventSource to stop for good: on sync workers the page
+    # falls back to its normal loads instead of pinning a worker
+    if not live_updates_enabled(Config.LIVE_UPDATES):
+        return '', 204
+    if Config.LIVE_CHANGE_STREAMS:
+        change_feed.start()
+    if not live_bus.subscribe(Config.LIVE_MAX_SUBSCRIBERS):
+        return jsonify({'message': 'Too many live subscribers, try again shortly'}), 503, {'Retry-After': '5'}
+
+    stream = sse_stream(
+        live_bus,
+        last_event_id=request.headers.get('Last-Event-ID') or request.args.get('lastEventId'),
+        hall=request.args.get('hall'),
+        heartbeat=Config.LIVE_HEARTBEAT_SECONDS,
+        max_seconds=Config.LIVE_STREAM_SECONDS
+    )
+
+    response = Response(stream, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(live_bus.unsubscribe)
+    return response
+
+# =============== JOB STATUS ===============
+def visible_job(job_id):
+    job = job_queue.get(job_id)
+    if job and (job.get('owner') in (None, get_jwt_identity()) or can_decide()):
+        return job
+    return None
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job(job_id):
+    job = visible_job(job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), 404
+    return jsonify(job_summary(job)), 200
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+@jwt_required()
+def get_job_result(job_id):
+    job = visible_job(job_id)
+    if not job:
+        return jsonify({'message': 'Job not found'}), 404
+    if job['status'] != 'succeeded' or job.get('result') is None:
+        return jsonify({'message': f"Job is {job['status']}", 'job': job_summary(job)}), 409
+    mimetype, filename = JOB_RESULT_TYPES.get(job['name'], ('application/octet-stream', 'result'))
+    return Response(bytes(job['result']), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename={filename}'})
+
 # =============== ICS EXPORT ROUTE ===============
 @app.route('/bookings/export/ics', methods=['POST'])
 @jwt_required()
@@ -421,66 +1094,75 @@ def export_bookings_ics():
         booking_ids = data.get('booking_ids', [])
         if not booking_ids:
             return jsonify({'message': 'No bookings provided'}), 400
-        db = get_database()
-        bookings = db['bookings']
-        cal = Calendar()
-        cal.add('prodid', '-//CIET Hall Booking System//EN')
-        cal.add('version', '2.0')
-        cal.add('calscale', 'GREGORIAN')
-        cal.add('method', 'PUBLISH')
-        cal.add('x-wr-calname', 'CIET Hall Bookings')
-        cal.add('x-wr-timezone', 'Asia/Kolkata')
-        event_count = 0
-        for booking_id in booking_ids:
-            try:
-                booking = bookings.find_one({'_id': ObjectId(booking_id)})
-                if not booking:
-                    continue
-                booking_date = datetime.strptime(booking['date'], '%Y-%m-%d')
-                time_slot = booking['time']
-                if time_slot == 'FN':
-                    start_time = booking_date.replace(hour=9, minute=0)
-                    end_time = booking_date.replace(hour=13, minute=0)
-                elif time_slot == 'AN':
-                    start_time = booking_date.replace(hour=14, minute=0)
-                    end_time = booking_date.replace(hour=18, minute=0)
-                else:
-                    start_time = booking_date.replace(hour=9, minute=0)
-                    end_time = booking_date.replace(hour=18, minute=0)
-                event = Event()
-                event.add('summary', f"{booking['hall']} - {booking['purpose']}")
-                event.add('dtstart', start_time)
-                event.add('dtend', end_time)
-                event.add('dtstamp', get_ist_now())
-                event.add('location', f"CIET {booking['hall']}")
-                event.add('description', f"Dept: {booking['department']}\nHOD: {booking['hod']}\nSeats: {booking['seats']}")
-                event.add('status', 'CONFIRMED')
-                event.add('uid', str(booking['_id']) + '@ciet.edu')
-                cal.add_component(event)
-                event_count += 1
-            except Exception as e:
-                print(f"Error processing booking {booking_id}: {e}")
-                continue
-        if event_count == 0:
+        if (data.get('async') or request.args.get('async') == '1') and job_queue.durable:
+            # Large exports: build in the background, poll /jobs/<id>. Only
+            # with the durable queue: in-process jobs live in one worker and
+            # the status poll may land on another, so those get the file now
+            job_id = job_queue.enqueue('export_ics', {'booking_ids': [str(i) for i in booking_ids]},
+                                       owner=get_jwt_identity())
+            return jsonify({'job': job_id, 'status_url': f'/jobs/{job_id}'}), 202
+        ids = parse_object_ids(booking_ids)
+        # One $in query for every requested booking, streamed in batches
+        # in _id order so the same selection always exports the same file
+        cursor = get_database()['bookings'].find(
+            {'_id': {'$in': ids}}, ICS_PROJECTION
+        ).sort('_id', 1).batch_size(ICS_BATCH_SIZE)
+        first = next(cursor, None)
+        if first is None:
             return jsonify({'message': 'No bookings to export'}), 400
-        ics_content = cal.to_ical()
-        return send_file(
-            BytesIO(ics_content),
+        chunks = iter_calendar(itertools.chain([first], cursor), 'CIET Hall Bookings', get_ist_now())
+        return Response(
+            chunks,
             mimetype='text/calendar',
-            as_attachment=True,
-            download_name='ciet_bookings.ics'
+            headers={'Content-Disposition': 'attachment; filename=ciet_bookings.ics'}
         )
     except Exception as e:
         print(f"❌ ICS export error: {e}")
         return jsonify({'message': str(e)}), 500
 
+def build_calendar_feed(hall):
+    since = (datetime.now(IST) - timedelta(days=Config.CALENDAR_FEED_PAST_DAYS)).replace(
+        tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    cursor = get_database()['bookings'].find({
+        'hall': hall,
+        'status': 'Approved',
+        '$or': ends_on_or_after(since)
+    }, dict(ICS_PROJECTION, approvedAt=1)).sort('_id', 1).batch_size(ICS_BATCH_SIZE)
+    bookings = list(cursor)
+    # Fixed event order, and DTSTAMP from the data rather than the build
+    # time, so every worker builds byte-identical feeds with the same ETag
+    dtstamp = max(
+        (b['approvedAt'] for b in bookings if b.get('approvedAt')),
+        default=datetime(2020, 1, 1)
+    ).replace(tzinfo=timezone.utc)
+    body = b''.join(iter_calendar(bookings, f'CIET - {hall}', dtstamp))
+    return {'body': body, 'etag': hashlib.sha1(body).hexdigest()}
+
+# Subscribable feed of a hall's approved bookings. Built once per hall and
+# cached until a booking write touches that hall; calendar apps polling
+# with If-None-Match get a 304. No Last-Modified: a rejection, archival or
+# a booking ageing out of the window changes the feed without any newer
+# timestamp to report, so only the content hash is a safe validator.
+@app.route('/calendar/<hall>.ics', methods=['GET'])
+def hall_calendar_feed(hall):
+    try:
+        feed = calendar_feed_cache.get_or_set(hall, lambda: build_calendar_feed(hall))
+        response = Response(feed['body'], mimetype='text/calendar')
+        response.set_etag(feed['etag'])
+        response.cache_control.public = True
+        response.cache_control.max_age = Config.CALENDAR_CACHE_SECONDS
+        return response.make_conditional(request)
+    except Exception as e:
+        print(f"❌ Calendar feed error: {e}")
+        return jsonify({'message': str(e)}), 500
+
 # =============== ERROR HANDLERS ===============
 @app.errorhandler(404)
 def not_found(e):
     if '.' in request.path:
         return jsonify({'message': 'File not found'}), 404
     try:
-        return send_from_directory('templates', 'index.html')
+        return send_page('index.html')
     except:
         return jsonify({'message': 'Not found'}), 404
 
@@ -505,25 +1187,90 @@ def reset_password():
             return jsonify({'message': 'Username and new password required'}), 400
 
         # 2. Hash the New Password
-        hashed_pwd = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt())
+        hashed_pwd = password_hasher.hash(new_password)
 
         # 3. Update in MongoDB
         db = get_database()
+        # Bumping tokenVersion revokes every token issued before the reset
         result = db['users'].update_one(
             {'username': username},
-            {'$set': {'password': hashed_pwd}}
+            {'$set': {'password': hashed_pwd}, '$inc': {'tokenVersion': 1}}
         )
 
         if result.matched_count == 0:
             return jsonify({'message': 'Username not found'}), 404
+        user_auth_cache.delete(username)
 
         return jsonify({'message': 'Password reset successfully'}), 200
 
+    except HasherBusy as e:
+        return jsonify({'message': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         print(f"❌ Reset Password error: {e}")
         return jsonify({'message': str(e)}), 500
 
-if __name__ == '__main__':
+# =============== CLI ===============
+# Importing this module never touches MongoDB (the client connects on first
+# use). Indexes and seed data are set up once per deploy with:
+#   flask --app app db bootstrap
+db_cli = AppGroup('db', help='Database maintenance commands.')
+
+@db_cli.command('bootstrap')
+def db_bootstrap():
+    """Create missing indexes and seed the initial halls (idempotent)."""
+    init_db()
     seed_assets()
+
+@db_cli.command('migrate-dates')
+@click.option('--batch-size', default=1000, show_default=True, help='Bookings per bulk_write.')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between batches.')
+@click.option('--limit', type=int, default=None, help='Stop after this many bookings.')
+@click.option('--restart', is_flag=True, help='Ignore the saved checkpoint.')
+def db_migrate_dates(batch_size, pause, limit, restart):
+    """Backfill typed start/end/slotMask on older bookings (resumable)."""
+    ensure_indexes(get_database())
+    stats = migrate_typed_dates(get_database(), batch_size=batch_size, pause=pause, limit=limit, restart=restart)
+    print(f"✅ {stats['updated']} bookings migrated in {stats['batches']} batches, "
+          f"{stats['skipped']} skipped, {stats['remaining']} remaining")
+
+@db_cli.command('import-bookings')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--created-by', default='import', show_default=True, help='Username recorded on the bookings.')
+@click.option('--status', type=click.Choice(['Pending', 'Approved']), default='Pending', show_default=True)
+@click.option('--dry-run', is_flag=True, help='Only report conflicts, write nothing.')
+def db_import_bookings(path, created_by, status, dry_run):
+    """Import bookings from a CSV or JSON timetable."""
+    with open(path, encoding='utf-8-sig') as f:
+        rows = parse_rows(f.read(), 'json' if path.endswith('.json') else 'csv')
+    report = run_import(rows, created_by, status=status, dry_run=dry_run)
+    for entry in report:
+        if entry['status'] in ('invalid', 'conflict'):
+            print(f"  row {entry['row']}: {entry['status']} - {entry['message']}")
+    print(f"✅ Import finished: {summarize_report(report)}")
+
+@db_cli.command('archive-bookings')
+@click.option('--older-than-days', type=int, default=None,
+              help='Archive bookings that ended this many days ago. [default: ARCHIVE_AFTER_DAYS]')
+@click.option('--batch-size', type=int, default=None, help='Bookings per batch. [default: ARCHIVE_BATCH_SIZE]')
+@click.option('--pause', default=0.0, show_default=True, help='Seconds to sleep between batches.')
+@click.option('--limit', type=int, default=None, help='Stop after this many bookings.')
+def db_archive_bookings(older_than_days, batch_size, pause, limit):
+    """Move bookings that ended long ago to bookings_archive (safe to re-run)."""
+    ensure_indexes(get_database())
+    stats = run_archival(batch_size=batch_size, limit=limit, pause=pause, days=older_than_days)
+    if stats.get('locked'):
+        print("⚠️ Another archival run is in progress, try again later")
+        return
+    print(f"✅ {stats['archived']} bookings archived in {stats['batches']} batches, "
+          f"{stats['remaining']} remaining")
+
+app.cli.add_command(db_cli)
+
+if __name__ == '__main__':
+    try:
+        init_db()
+        seed_assets()
+    except Exception as e:
+        print(f"❌ MongoDB connection error: {e}")
     port = int(os.environ.get('PORT', 5000))
     app.run(debug=True, host='0.0.0.0', port=port)
@@ -0,0 +1,128 @@
+import time
+from datetime import datetime, timedelta
+
+from pymongo import DeleteOne, ReplaceOne
+from pymongo.errors import DuplicateKeyError
+
+from scheduling import format_date
+
+ARCHIVE_COLLECTION = 'bookings_archive'
+LOCKS_COLLECTION = 'locks'
+ARCHIVE_LOCK = 'archive-bookings'
+
+
+def archive_cutoff(days, today=None):
+    today = today or datetime.now()
+    return datetime(today.year, today.month, today.day) - timedelta(days=days)
+
+
+def ended_before(cutoff):
+    # Bookings (any status) whose last day is before `cutoff`, the
+    # complement of scheduling.ends_on_or_after()
+    cutoff_str = format_date(cutoff)
+    return {'$or': [
+        {'end': {'$lt': cutoff}},
+        {'start': None, 'toDate': {'$lt': cutoff_str}},
+        {'start': None, 'fromDate': None, 'date': {'$lt': cutoff_str}}
+    ]}
+
+
+def acquire_lock(db, lease_seconds, every_seconds=None):
+    # One archiver at a time across every worker and the CLI: a lease in
+    # `locks` taken with a conditional upsert (losing it raises a
+    # duplicate key). With every_seconds, the scheduled runs of all
+    # workers also share one "not before" time, so one of them runs per
+    # interval however many workers tick.
+    now = datetime.utcnow()
+    conditions = [{'$or': [{'lockedUntil': None}, {'lockedUntil': {'$lt': now}}]}]
+    update = {'lockedUntil': now + timedelta(seconds=lease_seconds)}
+    if every_seconds:
+        conditions.append({'$or': [{'nextRunAt': None}, {'nextRunAt': {'$lte': now}}]})
+        update['nextRunAt'] = now + timedelta(seconds=every_seconds)
+    try:
+        db[LOCKS_COLLECTION].update_one({'_id': ARCHIVE_LOCK, '$and': conditions}, {'$set': update}, upsert=True)
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+def renew_lock(db, lease_seconds):
+    db[LOCKS_COLLECTION].update_one(
+        {'_id': ARCHIVE_LOCK}, {'$set': {'lockedUntil': datetime.utcnow() + timedelta(seconds=lease_seconds)}}
+    )
+
+
+def release_lock(db):
+    db[LOCKS_COLLECTION].update_one({'_id': ARCHIVE_LOCK}, {'$set': {'lockedUntil': None}})
+
+
+def archive_bookings(db, cutoff, batch_size=1000, pause=0.0, limit=None, progress=print,
+                     lease_seconds=600, every_seconds=None):
+    # Move bookings that ended before `cutoff` from `bookings` to
+    # `bookings_archive`, one batch at a time, under the archive lock
+    # (stats['locked'] when another run holds it, or the scheduled run
+    # isn't due yet).
+    #
+    # Each batch is upserted into the archive with ReplaceOne, so a copy
+    # left by an interrupted run is overwritten with the current version,
+    # then deleted from the hot collection only if status/approvedAt are
+    # still what was copied. A booking decided in between stays hot and
+    # its archive copy is dropped; the next run moves the new version.
+    #
+    # Archived bookings' slot_claims go in the same pass: every day they
+    # cover is before the cutoff, so they can never block a new booking
+    # and would only keep growing the hot collection.
+    if not acquire_lock(db, lease_seconds, every_seconds):
+        return {'archived': 0, 'batches': 0, 'remaining': None, 'locked': True}
+    try:
+        return _archive_batches(db, cutoff, batch_size, pause, limit, progress, lease_seconds)
+    finally:
+        release_lock(db)
+
+
+def _archive_batches(db, cutoff, batch_size, pause, limit, progress, lease_seconds):
+    bookings = db['bookings']
+    archive = db[ARCHIVE_COLLECTION]
+    query = ended_before(cutoff)
+    total = bookings.count_documents(query)
+    stats = {'archived': 0, 'batches': 0, 'remaining': total}
+    progress(f"{total} bookings ended before {format_date(cutoff)}")
+    started = time.monotonic()
+
+    while limit is None or stats['archived'] < limit:
+        size = batch_size if limit is None else min(batch_size, limit - stats['archived'])
+        batch = list(bookings.find(query).limit(size))
+        if not batch:
+            break
+        now = datetime.utcnow()
+        for doc in batch:
+            doc['archivedAt'] = now
+        archive.bulk_write([ReplaceOne({'_id': doc['_id']}, doc, upsert=True) for doc in batch], ordered=False)
+
+        result = bookings.bulk_write([
+            DeleteOne({'_id': doc['_id'], 'status': doc.get('status'), 'approvedAt': doc.get('approvedAt')})
+            for doc in batch
+        ], ordered=False)
+        moved = [doc['_id'] for doc in batch]
+        if result.deleted_count < len(batch):
+            changed = {doc['_id'] for doc in bookings.find({'_id': {'$in': moved}}, {'_id': 1})}
+            if changed:
+                archive.delete_many({'_id': {'$in': list(changed)}})
+                moved = [booking_id for booking_id in moved if booking_id not in changed]
+        if moved:
+            db['slot_claims'].delete_many({'bookingId': {'$in': moved}})
+        stats['archived'] += result.deleted_count
+        stats['batches'] += 1
+
+        elapsed = time.monotonic() - started
+        rate = stats['archived'] / elapsed if elapsed else 0.0
+        progress(f"  {stats['archived']}/{total} ({rate:.0f}/s)")
+        if result.deleted_count == 0:
+            # Every document in the batch changed under us; leave it for the next run
+            break
+        renew_lock(db, lease_seconds)
+        if pause:
+            time.sleep(pause)
+
+    stats['remaining'] = bookings.count_documents(query)
+    return stats
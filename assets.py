@@ -0,0 +1,122 @@
+import json
+import os
+
+from flask import request, send_from_directory
+
+# Serving side of build_assets.py. Everything degrades to plain files when
+# static/dist/ hasn't been built (e.g. local development).
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+STATIC_MAX_AGE = 3600
+IMAGE_MAX_AGE = 24 * 3600
+
+_manifest = None
+
+
+def get_manifest():
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(MANIFEST_PATH) as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {'files': {}, 'images': {}, 'templates': []}
+    return _manifest
+
+
+def source_path(filename):
+    # dist/images/board.3f9c1a2b7d.png -> images/board.png
+    manifest = get_manifest()
+    if 'sources' not in manifest:
+        manifest['sources'] = {built: path for path, built in manifest['files'].items()}
+    return manifest['sources'].get(filename)
+
+
+def _accepted_encoding(path):
+    accept = request.accept_encodings
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accept[encoding] and os.path.isfile(path + suffix):
+            return encoding, suffix
+    return None, ''
+
+
+def _send(directory, filename, max_age, mimetype=None):
+    # Serve the precompressed sibling when the client accepts it, otherwise
+    # the plain file
+    encoding, suffix = _accepted_encoding(os.path.join(directory, filename))
+    if encoding:
+        response = send_from_directory(directory, filename + suffix, mimetype=mimetype, max_age=max_age)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(directory, filename, mimetype=mimetype, max_age=max_age)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def send_page(name):
+    # HTML keeps stable URLs: revalidate every time, answered with a 304
+    # from the ETag when unchanged. The built copy links hashed assets.
+    if name in get_manifest()['templates']:
+        response = _send(os.path.join(DIST_DIR, 'templates'), name, max_age=None, mimetype='text/html')
+    else:
+        response = send_from_directory(TEMPLATES_DIR, name)
+    response.cache_control.no_cache = True
+    return response
+
+
+def _image_variant(filename):
+    variants = get_manifest()['images'].get(filename)
+    if not variants:
+        return None
+    # Only formats the browser names explicitly; */* doesn't promise AVIF
+    accepted = {mimetype for mimetype, _ in request.accept_mimetypes}
+    width = request.args.get('w', type=int)
+    for fmt in ('avif', 'webp'):
+        sizes = variants.get(fmt)
+        if not sizes or f'image/{fmt}' not in accepted:
+            continue
+        # Smallest variant at least as wide as requested, else the largest
+        ordered = sorted(sizes.items(), key=lambda item: int(item[0]))
+        if width:
+            fitting = [path for size, path in ordered if int(size) >= width]
+            return fitting[0] if fitting else ordered[-1][1]
+        return ordered[-1][1]
+    return None
+
+
+def send_static(filename):
+    if filename == 'dist/manifest.json':
+        # Not hashed, so it changes in place on every build: revalidate
+        # with the ETag instead of caching it for a year
+        response = _send(STATIC_DIR, filename, max_age=None)
+        response.cache_control.no_cache = True
+    elif filename.startswith('dist/'):
+        # Hashed URL: the source can't change under it, and neither can its
+        # WebP/AVIF variants, so those are negotiated here too
+        source = source_path(filename)
+        variant = _image_variant(source) if source else None
+        if variant:
+            response = send_from_directory(STATIC_DIR, variant, max_age=IMMUTABLE_MAX_AGE)
+        else:
+            response = _send(STATIC_DIR, filename, max_age=IMMUTABLE_MAX_AGE)
+        if source in get_manifest()['images']:
+            response.vary.add('Accept')
+        response.cache_control.immutable = True
+    else:
+        variant = _image_variant(filename)
+        if variant:
+            # Same URL, best format the browser accepts (and ?w= for width)
+            response = send_from_directory(STATIC_DIR, variant, max_age=IMAGE_MAX_AGE)
+            response.vary.add('Accept')
+        else:
+            response = _send(STATIC_DIR, filename, max_age=STATIC_MAX_AGE)
+            if filename in get_manifest()['images']:
+                response.vary.add('Accept')
+    response.cache_control.public = True
+    return response
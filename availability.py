@@ -0,0 +1,145 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from scheduling import (
+    ACTIVE_STATUSES, ends_on_or_after, format_date, occurrence_dates, overlap_clauses, slot_mask
+)
+
+# Per-day occupancy code: low two bits are the Pending slots, high two bits
+# the Approved slots (FN = 1, AN = 2). 0 means the hall is free all day.
+MAX_AVAILABILITY_DAYS = 366
+INDEX_PROJECTION = {'hall': 1, 'start': 1, 'end': 1, 'date': 1, 'fromDate': 1, 'toDate': 1, 'time': 1,
+                    'status': 1, 'recurrence': 1}
+
+
+def encode_rle(codes):
+    runs = []
+    for code in codes:
+        if runs and runs[-1][0] == code:
+            runs[-1][1] += 1
+        else:
+            runs.append([code, 1])
+    return runs
+
+
+class AvailabilityIndex:
+    # In-memory hall -> date -> {booking_id: (status, mask)} index of active
+    # bookings that end today or later. Writes in this process update it
+    # incrementally; a periodic reload picks up writes from other workers.
+    # Windows starting before the day it was loaded from are answered
+    # with a query instead, since past bookings aren't in it.
+
+    def __init__(self, get_database, refresh_seconds=30, tz=None):
+        self._get_database = get_database
+        # "Today" in the same timezone the routes use for their windows
+        self._tz = tz
+        self._refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._halls = {}
+        self._since = None
+        self._loaded_at = 0.0
+
+    def _ensure_loaded(self):
+        if time.monotonic() - self._loaded_at < self._refresh_seconds:
+            return
+        with self._lock:
+            if time.monotonic() - self._loaded_at < self._refresh_seconds:
+                return
+            self.reload()
+
+    def reload(self):
+        today = datetime.now(self._tz).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        query = {
+            'status': {'$in': ACTIVE_STATUSES},
+            '$or': ends_on_or_after(today)
+        }
+        halls = {}
+        for booking in self._get_database()['bookings'].find(query, INDEX_PROJECTION):
+            self._add(halls, booking)
+        with self._lock:
+            self._halls = halls
+            self._since = today
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def _add(self, halls, booking):
+        try:
+            occurrences = list(occurrence_dates(booking))
+        except (KeyError, TypeError, ValueError):
+            return
+        days = halls.setdefault(booking['hall'], {})
+        entry = (booking['status'], slot_mask(booking.get('time')))
+        for day in occurrences:
+            days.setdefault(format_date(day), {})[booking['_id']] = entry
+
+    def _remove(self, booking):
+        try:
+            occurrences = list(occurrence_dates(booking))
+        except (KeyError, TypeError, ValueError):
+            return
+        days = self._halls.get(booking['hall'], {})
+        for day in occurrences:
+            key = format_date(day)
+            entries = days.get(key)
+            if entries:
+                entries.pop(booking['_id'], None)
+                if not entries:
+                    del days[key]
+
+    def apply(self, booking):
+        # Called after a booking is created or changes status
+        with self._lock:
+            self._remove(booking)
+            if booking.get('status') in ACTIVE_STATUSES:
+                self._add(self._halls, booking)
+
+    def day_codes(self, hall, start, days):
+        self._ensure_loaded()
+        if start < self._since:
+            return self._codes(self._query_hall(hall, start, days), start, days)
+        with self._lock:
+            return self._codes(self._halls.get(hall, {}), start, days)
+
+    def _query_hall(self, hall, start, days):
+        query = {
+            'hall': hall,
+            'status': {'$in': ACTIVE_STATUSES},
+            '$or': overlap_clauses(start, start + timedelta(days=days - 1))
+        }
+        halls = {}
+        for booking in self._get_database()['bookings'].find(query, INDEX_PROJECTION):
+            self._add(halls, booking)
+        return halls.get(hall, {})
+
+    def _codes(self, hall_days, start, days):
+        codes = []
+        day = start
+        for _ in range(days):
+            pending = approved = 0
+            for status, mask in hall_days.get(format_date(day), {}).values():
+                if status == 'Approved':
+                    approved |= mask
+                else:
+                    pending |= mask
+            codes.append(approved << 2 | pending)
+            day += timedelta(days=1)
+        return codes
+
+    def free_days(self, halls, start, days, mask):
+        # {hall: [offsets of days in the window where no active booking
+        # touches `mask`]}, for every hall in one pass under one lock
+        self._ensure_loaded()
+        keys = [format_date(start + timedelta(days=i)) for i in range(days)]
+        free = {}
+        with self._lock:
+            for hall in halls:
+                hall_days = self._halls.get(hall, {})
+                free[hall] = [
+                    i for i, key in enumerate(keys)
+                    if not any(m & mask for _, m in hall_days.get(key, {}).values())
+                ]
+        return free
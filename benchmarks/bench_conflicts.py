@@ -0,0 +1,52 @@
+# Conflict check cost as the booking history grows: the old full Python
+# scan of every active booking versus the indexed overlap query.
+#
+#   python -m benchmarks.bench_conflicts            # local mongod
+#   BENCH_SIZES=1000,10000 BENCH_BACKEND=mongomock python -m benchmarks.bench_conflicts
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduling import find_conflict, parse_date
+from benchmarks.common import get_bench_database, measure, print_result
+from benchmarks.seed import ensure_booking_indexes, seed_bookings
+
+SIZES = [int(n) for n in os.getenv('BENCH_SIZES', '1000,10000,100000').split(',')]
+ITERATIONS = int(os.getenv('BENCH_ITERATIONS', 50))
+REQ_FROM = datetime(2025, 10, 6)
+REQ_TO = datetime(2025, 10, 8)
+
+
+def legacy_scan(bookings, hall, req_from, req_to, req_time):
+    # The pre-index implementation from create_booking()
+    for b in list(bookings.find({'hall': hall, 'status': {'$in': ['Pending', 'Approved']}})):
+        if 'fromDate' in b and 'toDate' in b:
+            b_from = parse_date(b['fromDate'])
+            b_to = parse_date(b['toDate'])
+        else:
+            b_from = parse_date(b['date'])
+            b_to = b_from
+        if req_from <= b_to and req_to >= b_from:
+            b_time = b.get('time')
+            if req_time == 'Full' or b_time == 'Full' or req_time == b_time:
+                return b
+    return None
+
+
+def main():
+    db = get_bench_database()
+    for size in SIZES:
+        print(f"{size} bookings")
+        seed_bookings(db, size)
+        ensure_booking_indexes(db)
+        bookings = db['bookings']
+        print_result('full scan', measure(
+            lambda: legacy_scan(bookings, 'Board Room', REQ_FROM, REQ_TO, 'FN'), iterations=ITERATIONS))
+        print_result('indexed query', measure(
+            lambda: find_conflict(bookings, 'Board Room', REQ_FROM, REQ_TO, 'FN'), iterations=ITERATIONS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# ICS export of many bookings: the old per-ID find_one + in-memory Calendar
+# versus one $in query streamed through iter_calendar(). Reports wall time
+# and the Python heap peak (tracemalloc) of each.
+#
+#   BENCH_SIZE=10000 python -m benchmarks.bench_ics
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from icalendar import Calendar
+from ics_export import ICS_BATCH_SIZE, ICS_PROJECTION, booking_events, iter_calendar
+from benchmarks.common import get_bench_database
+from benchmarks.seed import seed_bookings
+
+BENCH_SIZE = int(os.getenv('BENCH_SIZE', 10000))
+
+
+def materialized(bookings, ids, dtstamp):
+    cal = Calendar()
+    for booking_id in ids:
+        booking = bookings.find_one({'_id': booking_id})
+        for event in booking_events(booking, dtstamp):
+            cal.add_component(event)
+    return len(cal.to_ical())
+
+
+def streamed(bookings, ids, dtstamp):
+    cursor = bookings.find({'_id': {'$in': ids}}, ICS_PROJECTION).batch_size(ICS_BATCH_SIZE)
+    return sum(len(chunk) for chunk in iter_calendar(cursor, 'bench', dtstamp))
+
+
+def profile(name, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {name}: {elapsed:.2f}s, {size / 1e6:.1f} MB of ICS, peak heap {peak / 1e6:.1f} MB")
+
+
+def main():
+    db = get_bench_database()
+    seed_bookings(db, BENCH_SIZE)
+    bookings = db['bookings']
+    ids = [doc['_id'] for doc in bookings.find({}, {'_id': 1})]
+    dtstamp = datetime.now()
+    print(f"Exporting {len(ids)} bookings")
+    profile('find_one per id + Calendar', lambda: materialized(bookings, ids, dtstamp))
+    profile('$in query + streamed', lambda: streamed(bookings, ids, dtstamp))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# Semester timetable import: one reserve_booking() per row (what N calls
+# to POST /book cost) versus bulk_import.import_bookings() on the same rows.
+#
+#   BENCH_ROWS=5000 python -m benchmarks.bench_import             # local mongod
+#   BENCH_ROWS=1000 BENCH_BACKEND=mongomock python -m benchmarks.bench_import
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_import import build_booking, import_bookings, summarize_report
+from scheduling import parse_date, reserve_booking
+from benchmarks.common import get_bench_database
+from benchmarks.seed import DEPARTMENTS, HALLS, SLOTS, ensure_booking_indexes, seed_bookings
+
+BENCH_SIZE = int(os.getenv('BENCH_SIZE', 10000))
+BENCH_ROWS = int(os.getenv('BENCH_ROWS', 5000))
+
+
+def make_rows(count, seed=3):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        day = (datetime(2026, 7, 1) + timedelta(days=rng.randrange(150))).strftime('%Y-%m-%d')
+        rows.append({'hall': rng.choice(HALLS), 'fromDate': day, 'toDate': day, 'time': rng.choice(SLOTS),
+                     'dept': rng.choice(DEPARTMENTS), 'hod': 'Bench', 'purpose': f'Timetable {i}', 'seats': 20})
+    return rows
+
+
+def reset(db):
+    seed_bookings(db, BENCH_SIZE)
+    db['slot_claims'].drop()
+    ensure_booking_indexes(db)
+
+
+def one_by_one(db, rows):
+    created = 0
+    for row in rows:
+        doc = build_booking(row, 'bench', 'Pending', datetime.now(), lambda hall, seats: None)
+        booking_id, _ = reserve_booking(db, doc, parse_date(doc['fromDate']), parse_date(doc['toDate']))
+        created += booking_id is not None
+    return created
+
+
+def main():
+    db = get_bench_database()
+    rows = make_rows(BENCH_ROWS)
+    print(f"Importing {BENCH_ROWS} rows over {BENCH_SIZE} existing bookings")
+
+    reset(db)
+    start = time.perf_counter()
+    created = one_by_one(db, rows)
+    print(f"  per-row reserve_booking: {time.perf_counter() - start:.2f}s, {created} created")
+
+    reset(db)
+    start = time.perf_counter()
+    report, _ = import_bookings(db, rows, 'bench', datetime.now(), lambda hall, seats: None)
+    print(f"  import_bookings: {time.perf_counter() - start:.2f}s, {summarize_report(report)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# Peak RSS and wall time of GET /bookings with the legacy full list, keyset
+# pages and NDJSON streaming. Each mode runs in its own process so the
+# ru_maxrss numbers don't bleed into each other.
+#
+#   BENCH_SIZE=1000000 python -m benchmarks.bench_listing      # local mongod
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.common import BENCH_BACKEND, BENCH_DB_NAME, BENCH_MONGO_URI, get_bench_database
+from benchmarks.seed import ensure_booking_indexes, seed_bookings
+
+BENCH_SIZE = int(os.getenv('BENCH_SIZE', 1000000))
+MODES = ['list', 'page', 'ndjson']
+
+
+def seed_if_needed(db):
+    if db['bookings'].estimated_document_count() != BENCH_SIZE:
+        print(f"Seeding {BENCH_SIZE} bookings...")
+        seed_bookings(db, BENCH_SIZE)
+        ensure_booking_indexes(db)
+
+
+def load_app():
+    os.environ['MONGO_URI'] = BENCH_MONGO_URI
+    os.environ['MONGO_DB_NAME'] = BENCH_DB_NAME
+    import config
+    if BENCH_BACKEND == 'mongomock':
+        # mongomock lives in this process only, so seed it here
+        from benchmarks.common import get_bench_client
+        config._client = get_bench_client()
+        config._client_pid = os.getpid()
+        seed_if_needed(config.get_database())
+    import app as app_module
+    from flask_jwt_extended import create_access_token
+    users = config.get_database()['users']
+    users.update_one({'username': 'bench'}, {'$set': {'role': 'administrator'}}, upsert=True)
+    with app_module.app.app_context():
+        token = create_access_token(identity='bench', additional_claims={'role': 'administrator'})
+    return app_module.app.test_client(), {'Authorization': f'Bearer {token}'}
+
+
+def run_mode(mode):
+    client, headers = load_app()
+    start = time.perf_counter()
+    count = 0
+    if mode == 'list':
+        count = len(client.get('/bookings', headers=headers).get_json()['items'])
+    elif mode == 'page':
+        cursor = None
+        while True:
+            url = '/bookings?limit=1000' + (f'&cursor={cursor}' if cursor else '')
+            body = client.get(url, headers=headers).get_json()
+            count += len(body['items'])
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+    else:
+        response = client.get('/bookings?format=ndjson', headers=headers, buffered=False)
+        for chunk in response.response:
+            count += chunk.count(b'\n') if isinstance(chunk, bytes) else chunk.count('\n')
+        response.close()
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  {mode}: {count} bookings in {elapsed:.2f}s, peak RSS {peak_mb:.0f} MB")
+
+
+def main():
+    if len(sys.argv) > 1:
+        run_mode(sys.argv[1])
+        return
+    if BENCH_BACKEND != 'mongomock':
+        seed_if_needed(get_bench_database())
+    print(f"GET /bookings over {BENCH_SIZE} bookings")
+    for mode in MODES:
+        subprocess.run([sys.executable, '-m', 'benchmarks.bench_listing', mode], cwd=ROOT, check=True)
+
+
+if __name__ == '__main__':
+    main()
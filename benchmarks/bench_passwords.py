@@ -0,0 +1,56 @@
+# Login verification throughput (verifications/sec) against the size of the
+# bcrypt worker pool, with many request threads hitting it at once.
+#
+#   BENCH_ROUNDS=12 python -m benchmarks.bench_passwords
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+from passwords import HasherBusy, PasswordHasher
+
+ROUNDS = int(os.getenv('BENCH_ROUNDS', 12))
+LOGINS = int(os.getenv('BENCH_LOGINS', 64))
+CLIENT_THREADS = int(os.getenv('BENCH_THREADS', 32))
+WORKER_COUNTS = [int(n) for n in os.getenv('BENCH_WORKERS', '1,2,4,8').split(',')]
+
+
+def run(workers, hashed):
+    hasher = PasswordHasher(rounds=ROUNDS, workers=workers, max_pending=LOGINS)
+    remaining = iter(range(LOGINS))
+    lock = threading.Lock()
+    busy = []
+
+    def client():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            try:
+                hasher.verify('correct horse', hashed)
+            except HasherBusy:
+                busy.append(1)
+
+    threads = [threading.Thread(target=client) for _ in range(CLIENT_THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    print(f"  workers={workers}: {LOGINS / elapsed:.1f} logins/sec ({elapsed:.2f}s, rejected={len(busy)})")
+
+
+def main():
+    print(f"bcrypt cost {ROUNDS}, {LOGINS} logins from {CLIENT_THREADS} threads, {os.cpu_count()} CPUs")
+    hashed = bcrypt.hashpw(b'correct horse', bcrypt.gensalt(rounds=ROUNDS))
+    for workers in WORKER_COUNTS:
+        run(workers, hashed)
+
+
+if __name__ == '__main__':
+    main()
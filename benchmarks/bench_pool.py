@@ -0,0 +1,42 @@
+# Per-request latency of the old "new MongoClient + ping per call" pattern
+# versus the pooled per-process client from config.get_database().
+#
+#   MONGO_URI=mongodb://localhost:27017 python -m benchmarks.bench_pool
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pymongo import MongoClient
+from config import Config, get_database, get_pool_stats, close_mongo_client
+from benchmarks.common import measure, print_result
+
+ITERATIONS = int(os.getenv('BENCH_ITERATIONS', 200))
+
+
+def per_request_client():
+    # What every route did before: build a client, ping, query, drop it.
+    client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=5000)
+    client.admin.command('ping')
+    client[Config.MONGO_DB_NAME]['users'].find_one({'username': '__bench__'})
+    client.close()
+
+
+def pooled_client():
+    get_database()['users'].find_one({'username': '__bench__'})
+
+
+def main():
+    print(f"Pool benchmark against {Config.MONGO_URI} ({ITERATIONS} requests)")
+    before = measure(per_request_client, iterations=ITERATIONS)
+    print_result('per-request client', before)
+    close_mongo_client()
+    after = measure(pooled_client, iterations=ITERATIONS)
+    print_result('pooled client', after)
+    print_result('pool stats', get_pool_stats())
+    if after['mean_ms']:
+        print(f"  speedup: {before['mean_ms'] / after['mean_ms']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
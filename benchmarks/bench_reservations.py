@@ -0,0 +1,83 @@
+# Concurrency stress test for the slot reservation path: many threads book
+# random overlapping ranges in one hall at the same time, then every
+# (date, slot) cell is checked for double bookings.
+#
+#   python -m benchmarks.bench_reservations        # local mongod
+#   BENCH_BACKEND=mongomock python -m benchmarks.bench_reservations
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scheduling import SLOT_PARTS, booking_range, format_date, reserve_booking
+from benchmarks.common import get_bench_database
+from benchmarks.seed import ensure_booking_indexes
+
+THREADS = int(os.getenv('BENCH_THREADS', 32))
+ATTEMPTS_PER_THREAD = int(os.getenv('BENCH_ATTEMPTS', 50))
+WINDOW_DAYS = int(os.getenv('BENCH_WINDOW_DAYS', 30))
+WINDOW_START = datetime(2026, 1, 5)
+
+
+def worker(db, seed, results):
+    rng = random.Random(seed)
+    for _ in range(ATTEMPTS_PER_THREAD):
+        req_from = WINDOW_START + timedelta(days=rng.randrange(WINDOW_DAYS))
+        req_to = req_from + timedelta(days=rng.choice([0, 0, 1, 2]))
+        doc = {
+            'hall': 'Auditorium',
+            'date': format_date(req_from),
+            'fromDate': format_date(req_from),
+            'toDate': format_date(req_to),
+            'time': rng.choice(['FN', 'AN', 'Full']),
+            'status': 'Pending',
+            'createdBy': f'stress{seed}'
+        }
+        booking_id, conflict = reserve_booking(db, doc, req_from, req_to)
+        results.append('booked' if booking_id else 'conflict')
+
+
+def count_double_bookings(db):
+    cells = Counter()
+    for b in db['bookings'].find({'status': {'$in': ['Pending', 'Approved']}}):
+        b_from, b_to = booking_range(b)
+        day = b_from
+        while day <= b_to:
+            for slot in SLOT_PARTS[b['time']]:
+                cells[(b['hall'], format_date(day), slot)] += 1
+            day += timedelta(days=1)
+    return sum(1 for count in cells.values() if count > 1)
+
+
+def main():
+    db = get_bench_database()
+    db['bookings'].drop()
+    db['slot_claims'].drop()
+    ensure_booking_indexes(db)
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(db, i, results)) for i in range(THREADS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    outcome = Counter(results)
+    doubles = count_double_bookings(db)
+    print(f"{THREADS} threads x {ATTEMPTS_PER_THREAD} attempts in {elapsed:.2f}s "
+          f"({len(results) / elapsed:.0f} reservations/sec)")
+    print(f"  booked={outcome['booked']} conflicts={outcome['conflict']} double_booked_cells={doubles}")
+    if doubles:
+        raise SystemExit("❌ Double bookings detected")
+    print("✅ No double bookings")
+
+
+if __name__ == '__main__':
+    main()
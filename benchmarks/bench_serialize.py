@@ -0,0 +1,74 @@
+# GET /bookings over 50k bookings: encoder time for the old path (copy
+# every document to stringify _id, then Flask's default encoder) versus
+# serialization.dumps, and bytes on the wire for identity, gzip and br.
+#
+#   python -m benchmarks.bench_serialize                        # local mongod
+#   BENCH_BACKEND=mongomock python -m benchmarks.bench_serialize
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask.json.provider import DefaultJSONProvider
+
+import compression
+import serialization
+import benchmarks.bench_listing as listing
+from benchmarks.common import BENCH_BACKEND, get_bench_database, measure, print_result
+
+BENCH_SIZE = int(os.getenv('BENCH_SIZE', 50000))
+BENCH_ITERATIONS = int(os.getenv('BENCH_ITERATIONS', 5))
+ENCODINGS = ['identity', 'gzip', 'br']
+
+
+def legacy_dumps(provider, docs):
+    items = []
+    for doc in docs:
+        doc = dict(doc)
+        doc['_id'] = str(doc['_id'])
+        items.append(doc)
+    return provider.dumps({'items': items}).encode()
+
+
+def main():
+    listing.BENCH_SIZE = BENCH_SIZE
+    if BENCH_BACKEND != 'mongomock':
+        listing.seed_if_needed(get_bench_database())
+    client, headers = listing.load_app()
+    import app as app_module
+    docs = list(app_module.get_database()['bookings'].find())
+    encoder = 'orjson' if serialization.orjson is not None else 'json (orjson not installed)'
+    print(f"Serializing {len(docs)} bookings with {encoder}")
+
+    legacy = DefaultJSONProvider(app_module.app)
+    body = serialization.dumps({'items': docs})
+    print_result('legacy_dumps', dict(measure(lambda: legacy_dumps(legacy, docs), BENCH_ITERATIONS, 1),
+                                      bytes=len(legacy_dumps(legacy, docs))))
+    print_result('serialization_dumps', dict(measure(lambda: serialization.dumps({'items': docs}),
+                                                     BENCH_ITERATIONS, 1), bytes=len(body)))
+    for encoding in ('gzip', 'br'):
+        if encoding == 'br' and compression.brotli is None:
+            print("  compress_br: skipped (brotli not installed)")
+            continue
+        print_result(f'compress_{encoding}', dict(
+            measure(lambda: compression.compress(body, encoding), BENCH_ITERATIONS, 1),
+            bytes=len(compression.compress(body, encoding))))
+
+    print("GET /bookings (full list) through the app")
+    for encoding in ENCODINGS:
+        request_headers = dict(headers, **{'Accept-Encoding': encoding})
+        wire = 0
+        samples = []
+        for _ in range(BENCH_ITERATIONS):
+            start = time.perf_counter()
+            response = client.get('/bookings', headers=request_headers)
+            samples.append(time.perf_counter() - start)
+            wire = len(response.data)
+        served = response.headers.get('Content-Encoding', 'identity')
+        print(f"  {encoding}: served as {served}, {wire} bytes on the wire, "
+              f"best {min(samples) * 1000:.0f} ms, worst {max(samples) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+# Worker cold start: time to import app.py and time for the first request
+# that touches MongoDB. Each run is a fresh interpreter, like a new
+# gunicorn worker.
+#
+#   python -m benchmarks.bench_startup
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.common import BENCH_DB_NAME, BENCH_MONGO_URI, summarize
+
+RUNS = int(os.getenv('BENCH_RUNS', 10))
+
+CHILD = '''
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.app.test_client()
+status = client.get('/public/bookings?limit=1').status_code
+first = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_request': first - imported, 'status': status}))
+'''
+
+
+def main():
+    env = dict(os.environ, MONGO_URI=BENCH_MONGO_URI, MONGO_DB_NAME=BENCH_DB_NAME)
+    imports, firsts = [], []
+    for _ in range(RUNS):
+        output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        imports.append(result['import'])
+        firsts.append(result['first_request'])
+    print(f"Cold start over {RUNS} runs")
+    print(f"  import app: {summarize(imports)}")
+    print(f"  first request: {summarize(firsts)}")
+
+
+if __name__ == '__main__':
+    main()
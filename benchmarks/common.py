@@ -0,0 +1,89 @@
+import os
+import statistics
+import time
+
+# Benchmarks run against BENCH_MONGO_URI (a local mongod by default).
+# Set BENCH_BACKEND=mongomock to run the pure-Python parts without a server.
+BENCH_MONGO_URI = os.getenv('BENCH_MONGO_URI', 'mongodb://localhost:27017')
+BENCH_DB_NAME = os.getenv('BENCH_DB_NAME', 'ciet_hall_booking_bench')
+BENCH_BACKEND = os.getenv('BENCH_BACKEND', 'mongod')
+
+
+def get_bench_client():
+    if BENCH_BACKEND == 'mongomock':
+        try:
+            import mongomock
+        except ImportError:
+            raise SystemExit("BENCH_BACKEND=mongomock requires 'pip install mongomock'")
+        return mongomock.MongoClient()
+    from pymongo import MongoClient
+    return MongoClient(BENCH_MONGO_URI, serverSelectionTimeoutMS=5000)
+
+
+def get_bench_database(client=None):
+    client = client or get_bench_client()
+    return client[BENCH_DB_NAME]
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(samples):
+    # samples are in seconds, results in milliseconds
+    return {
+        'runs': len(samples),
+        'mean_ms': round(statistics.mean(samples) * 1000, 3) if samples else 0.0,
+        'p50_ms': round(percentile(samples, 50) * 1000, 3),
+        'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        'p99_ms': round(percentile(samples, 99) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3) if samples else 0.0
+    }
+
+
+def measure(fn, iterations=100, warmup=5):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def print_result(name, result):
+    fields = ', '.join(f"{k}={v}" for k, v in result.items())
+    print(f"  {name}: {fields}")
+
+
+def environment_info():
+    import platform
+    import subprocess
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                  text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        'revision': revision,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': BENCH_BACKEND,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z')
+    }
+
+
+def write_results(path, suite, results, **params):
+    # One JSON document per run, so two runs can be diffed with
+    # python -m benchmarks.suite --compare old.json new.json
+    import json
+    report = {'suite': suite, 'environment': environment_info(), 'params': params, 'results': results}
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"✅ Results written to {path}")
+    return report
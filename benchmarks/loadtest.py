@@ -0,0 +1,137 @@
+# Sync vs async (gevent) serving under concurrent load. Starts gunicorn in
+# each mode against the benchmark database, drives the booking, listing,
+# availability and ICS routes from N concurrent asyncio clients, and prints
+# requests/sec and latency percentiles.
+#
+#   python -m benchmarks.loadtest                       # 50,200,1000 clients
+#   BENCH_CONCURRENCY=50 BENCH_DURATION=5 python -m benchmarks.loadtest
+import asyncio
+import json
+import os
+import random
+import resource
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import jwt
+from config import Config
+from benchmarks.common import BENCH_DB_NAME, BENCH_MONGO_URI, get_bench_database, summarize
+from benchmarks.seed import ensure_booking_indexes, seed_bookings, seed_halls
+
+HOST = '127.0.0.1'
+PORT = int(os.getenv('BENCH_PORT', 5055))
+CONCURRENCY = [int(n) for n in os.getenv('BENCH_CONCURRENCY', '50,200,1000').split(',')]
+DURATION = float(os.getenv('BENCH_DURATION', 15))
+SEED_SIZE = int(os.getenv('BENCH_SIZE', 10000))
+WORKERS = os.getenv('BENCH_WORKERS', '2')
+MODES = os.getenv('BENCH_MODES', 'sync,async').split(',')
+
+
+def make_token(username):
+    now = datetime.now(timezone.utc)
+    payload = {
+        'sub': username, 'type': 'access', 'fresh': False, 'jti': os.urandom(8).hex(),
+        'iat': now, 'nbf': now, 'exp': now + timedelta(hours=1),
+        'role': 'administrator', 'ver': 0
+    }
+    return jwt.encode(payload, Config.JWT_SECRET_KEY, algorithm='HS256')
+
+
+def scenario(rng):
+    # Weighted mix of the hot routes
+    roll = rng.random()
+    if roll < 0.35:
+        return 'GET', '/bookings?limit=50', None
+    if roll < 0.65:
+        return 'GET', '/availability?hall=Auditorium&days=60', None
+    if roll < 0.85:
+        return 'GET', '/calendar/Auditorium.ics', None
+    day = (datetime(2030, 1, 1) + timedelta(days=rng.randrange(3650))).strftime('%Y-%m-%d')
+    body = {'hall': rng.choice(['Auditorium', 'Seminar Hall', 'Board Room']), 'fromDate': day, 'toDate': day,
+            'time': rng.choice(['FN', 'AN']), 'dept': 'CSE', 'hod': 'Load', 'purpose': 'Load test', 'seats': 50}
+    return 'POST', '/book', json.dumps(body).encode()
+
+
+async def http_request(method, path, token, body):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    head = [f'{method} {path} HTTP/1.1', f'Host: {HOST}:{PORT}', 'Connection: close',
+            f'Authorization: Bearer {token}']
+    if body is not None:
+        head += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + (body or b''))
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def client(token, deadline, seed, latencies, statuses):
+    rng = random.Random(seed)
+    while time.perf_counter() < deadline:
+        method, path, body = scenario(rng)
+        start = time.perf_counter()
+        try:
+            status = await http_request(method, path, token, body)
+        except (OSError, IndexError, ValueError):
+            status = 'error'
+        latencies.append(time.perf_counter() - start)
+        statuses[status] = statuses.get(status, 0) + 1
+
+
+async def drive(token, concurrency):
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + DURATION
+    await asyncio.gather(*(client(token, deadline, i, latencies, statuses) for i in range(concurrency)))
+    return latencies, statuses
+
+
+def start_server(mode):
+    env = dict(os.environ, MONGO_URI=BENCH_MONGO_URI, MONGO_DB_NAME=BENCH_DB_NAME, PORT=str(PORT),
+               WEB_CONCURRENCY=WORKERS, ASYNC_MODE='1' if mode == 'async' else '0')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f'http://{HOST}:{PORT}/health', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise SystemExit(f'❌ gunicorn ({mode}) did not start')
+
+
+def main():
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    db = get_bench_database()
+    seed_bookings(db, SEED_SIZE)
+    ensure_booking_indexes(db)
+    db['slot_claims'].drop()
+    # /book rejects unknown halls; without them the POST share is all 400s
+    seed_halls(db)
+    db['users'].update_one({'username': 'loadtest'}, {'$set': {'role': 'administrator'}}, upsert=True)
+    token = make_token('loadtest')
+
+    for mode in MODES:
+        server = start_server(mode)
+        try:
+            for concurrency in CONCURRENCY:
+                latencies, statuses = asyncio.run(drive(token, concurrency))
+                result = summarize(latencies)
+                print(f"{mode:5} c={concurrency:<5} {len(latencies) / DURATION:8.1f} req/s  "
+                      f"p50={result['p50_ms']}ms p99={result['p99_ms']}ms  statuses={statuses}")
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+
+from config import ensure_indexes
+
+HALLS = ['Auditorium', 'Seminar Hall', 'Board Room']
+DEPARTMENTS = ['CSE', 'ECE', 'AIDS', 'MCT', 'CIVIL', 'MECH', 'IT', 'EEE', 'AIML', 'MBA']
+SLOTS = ['FN', 'AN', 'Full']
+STATUSES = ['Pending', 'Approved', 'Approved', 'Rejected']
+IST = timezone(timedelta(hours=5, minutes=30))
+EPOCH = datetime(2019, 1, 1)
+
+
+def make_booking(index, rng, history_days=2500, legacy_ratio=0.2):
+    # Spread bookings over ~7 years of history; some are legacy 'date'-only
+    # docs and some span several days, like the real collection.
+    start = EPOCH + timedelta(days=rng.randrange(history_days))
+    created = datetime.combine(start.date(), datetime.min.time(), IST) - timedelta(days=rng.randrange(1, 30))
+    doc = {
+        '_id': ObjectId(),
+        'hall': rng.choice(HALLS),
+        'date': start.strftime('%Y-%m-%d'),
+        'time': rng.choice(SLOTS),
+        'department': rng.choice(DEPARTMENTS),
+        'hod': f'HOD {index % 50}',
+        'purpose': f'Synthetic event {index}',
+        'seats': rng.randrange(20, 400),
+        'details': '',
+        'createdBy': f'staff{index % 200}',
+        'status': rng.choice(STATUSES),
+        'createdAt': created
+    }
+    if rng.random() >= legacy_ratio:
+        span = rng.choice([0, 0, 0, 1, 2, 4])
+        doc['fromDate'] = doc['date']
+        doc['toDate'] = (start + timedelta(days=span)).strftime('%Y-%m-%d')
+    return doc
+
+
+def seed_bookings(db, count, seed=42, batch_size=5000, drop=True):
+    rng = random.Random(seed)
+    if drop:
+        db['bookings'].drop()
+    batch = []
+    for i in range(count):
+        batch.append(make_booking(i, rng))
+        if len(batch) >= batch_size:
+            db['bookings'].insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db['bookings'].insert_many(batch, ordered=False)
+
+
+def ensure_booking_indexes(db):
+    ensure_indexes(db)
+
+
+def make_series(index, rng, history_days=2500):
+    # Weekly recurring booking over a term, stored as one document
+    doc = make_booking(index, rng, history_days=history_days, legacy_ratio=0)
+    start = datetime.strptime(doc['date'], '%Y-%m-%d')
+    until = start + timedelta(weeks=rng.randrange(4, 20))
+    doc['recurrence'] = {
+        'freq': 'weekly', 'interval': 1, 'byweekday': [start.weekday()],
+        'start': doc['date'], 'until': until.strftime('%Y-%m-%d'), 'exdates': []
+    }
+    doc['toDate'] = until.strftime('%Y-%m-%d')
+    return doc
+
+
+def seed_series(db, count, seed=7):
+    rng = random.Random(seed)
+    if count:
+        db['bookings'].insert_many([make_series(i, rng) for i in range(count)], ordered=False)
+
+
+def seed_users(db, count, password_hash, role='staff'):
+    # bench0..benchN-1 all share one precomputed bcrypt hash
+    db['users'].delete_many({'username': {'$regex': '^bench'}})
+    db['users'].insert_many([{
+        'username': f'bench{i}', 'email': f'bench{i}@bench.local', 'full_name': f'Bench User {i}',
+        'password': password_hash, 'role': role, 'department': DEPARTMENTS[i % len(DEPARTMENTS)]
+    } for i in range(count)], ordered=False)
+
+
+def seed_halls(db):
+    for hall, seats in zip(HALLS, [500, 250, 60]):
+        db['assets'].update_one({'name': hall}, {'$setOnInsert': {'name': hall, 'seats': seats}}, upsert=True)
@@ -0,0 +1,306 @@
+# Full benchmark suite: seeds a realistic booking history, micro-benchmarks
+# the hot helpers, times every API route through the Flask test client and
+# runs concurrent login-storm / booking-burst / dashboard-refresh scenarios.
+# Everything lands in one JSON file so runs can be compared.
+#
+#   BENCH_SIZE=100000 python -m benchmarks.suite                    # local mongod
+#   BENCH_BACKEND=mongomock BENCH_SIZE=10000 python -m benchmarks.suite
+#   BENCH_ONLY=routes,scenarios BENCH_OUTPUT=after.json python -m benchmarks.suite
+#   python -m benchmarks.suite --compare before.json after.json
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.common import (
+    BENCH_BACKEND, BENCH_DB_NAME, BENCH_MONGO_URI, get_bench_client, summarize, write_results
+)
+from benchmarks.seed import HALLS, seed_bookings, seed_halls, seed_series, seed_users
+
+BENCH_SIZE = int(os.getenv('BENCH_SIZE', 10000))
+BENCH_SERIES = int(os.getenv('BENCH_SERIES', max(BENCH_SIZE // 100, 1)))
+ITERATIONS = int(os.getenv('BENCH_ITERATIONS', 30))
+CONCURRENCY = int(os.getenv('BENCH_CONCURRENCY', 16))
+SCENARIO_REQUESTS = int(os.getenv('BENCH_SCENARIO_REQUESTS', 400))
+USERS = int(os.getenv('BENCH_USERS', 200))
+OUTPUT = os.getenv('BENCH_OUTPUT', 'bench-results.json')
+GROUPS = os.getenv('BENCH_ONLY', 'micro,routes,scenarios').split(',')
+PASSWORD = 'bench-password'
+
+
+def load_app():
+    os.environ['MONGO_URI'] = BENCH_MONGO_URI
+    os.environ['MONGO_DB_NAME'] = BENCH_DB_NAME
+    import config
+    if BENCH_BACKEND == 'mongomock':
+        config._client = get_bench_client()
+        config._client_pid = os.getpid()
+    import app as app_module
+    return config, app_module
+
+
+def seed(config, app_module):
+    db = config.get_database()
+    print(f"Seeding {BENCH_SIZE} bookings + {BENCH_SERIES} recurring series, {USERS} users...")
+    seed_bookings(db, BENCH_SIZE)
+    seed_series(db, BENCH_SERIES)
+    db['slot_claims'].drop()
+    config.ensure_indexes(db)
+    seed_halls(db)
+    seed_users(db, USERS, app_module.password_hasher.hash(PASSWORD))
+    db['users'].update_one({'username': 'bench0'}, {'$set': {'role': 'administrator'}})
+    app_module.asset_catalog.invalidate()
+    return db
+
+
+def timed(fn, iterations=ITERATIONS, warmup=3):
+    # Like common.measure, but keeps what fn returns (HTTP status codes)
+    for _ in range(warmup):
+        fn()
+    samples, outcomes = [], Counter()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        outcome = fn()
+        samples.append(time.perf_counter() - start)
+        if isinstance(outcome, int):
+            outcomes[str(outcome)] += 1
+    result = summarize(samples)
+    if outcomes:
+        result['statuses'] = dict(outcomes)
+    return result
+
+
+def record(results, name, fn, **kwargs):
+    try:
+        results[name] = timed(fn, **kwargs)
+    except Exception as e:
+        results[name] = {'error': f'{type(e).__name__}: {e}'}
+    print(f"  {name}: {json.dumps(results[name], sort_keys=True)}")
+
+
+# =============== MICRO BENCHMARKS ===============
+
+def run_micro(db, app_module):
+    from ics_export import ICS_PROJECTION, iter_calendar
+    from scheduling import find_conflict, first_common_date, parse_date
+    from serialization import dumps
+    results = {}
+    bookings = db['bookings']
+    req_from, req_to = parse_date('2024-10-07'), parse_date('2024-10-09')
+    record(results, 'find_conflict', lambda: find_conflict(bookings, 'Board Room', req_from, req_to, 'FN'))
+    series = bookings.find_one({'recurrence': {'$exists': True}})
+    if series:
+        s_from, s_to = parse_date(series['fromDate']), parse_date(series['toDate'])
+        record(results, 'find_conflict_series', lambda: find_conflict(
+            bookings, series['hall'], s_from, s_to, series['time'], exclude_id=series['_id'], request=series))
+        others = list(bookings.find({'recurrence': {'$exists': True}}).limit(200))
+        record(results, 'first_common_date_x200', lambda: [first_common_date(series, o) for o in others])
+    page = list(bookings.find().limit(1000))
+    record(results, 'serialize_1000', lambda: dumps({'items': page}))
+    ics_docs = list(bookings.find({}, ICS_PROJECTION).limit(500))
+    dtstamp = datetime(2025, 1, 1)
+    record(results, 'ics_500', lambda: b''.join(iter_calendar(ics_docs, 'bench', dtstamp)), iterations=5)
+    record(results, 'availability_reload', app_module.availability_index.reload, iterations=5)
+    record(results, 'booking_stats', lambda: app_module.booking_stats(db), iterations=10)
+    return results
+
+
+# =============== ROUTES ===============
+
+def pending_pool(db, count):
+    # Bookings far in the future for approve/reject/decisions to toggle
+    base = datetime(2045, 1, 1)
+    docs = [{
+        'hall': HALLS[i % len(HALLS)], 'date': (base + timedelta(days=i)).strftime('%Y-%m-%d'),
+        'fromDate': (base + timedelta(days=i)).strftime('%Y-%m-%d'),
+        'toDate': (base + timedelta(days=i)).strftime('%Y-%m-%d'),
+        'time': 'FN', 'department': 'CSE', 'hod': 'Bench', 'purpose': 'Bench pool', 'seats': 10,
+        'createdBy': 'bench1', 'status': 'Pending', 'createdAt': datetime(2025, 1, 1)
+    } for i in range(count)]
+    db['bookings'].insert_many(docs)
+    return [str(d['_id']) for d in docs]
+
+
+def run_routes(db, app_module):
+    app = app_module.app
+    client = app.test_client()
+    with app.app_context():
+        admin = {'Authorization': 'Bearer ' + app_module.issue_token(db['users'].find_one({'username': 'bench0'}))}
+        staff = {'Authorization': 'Bearer ' + app_module.issue_token(db['users'].find_one({'username': 'bench1'}))}
+    counter = itertools.count()
+    toggles = {}
+    pool = pending_pool(db, 50)
+    ids = [str(d['_id']) for d in db['bookings'].find({}, {'_id': 1}).limit(200)]
+
+    def get(path, headers=None):
+        return lambda: client.get(path, headers=headers).status_code
+
+    def post(path, body_fn, headers=None):
+        return lambda: client.post(path(), json=body_fn(), headers=headers).status_code
+
+    def new_booking():
+        day = (datetime(2050, 1, 1) + timedelta(days=next(counter))).strftime('%Y-%m-%d')
+        return {'hall': 'Seminar Hall', 'fromDate': day, 'toDate': day, 'time': 'FN', 'dept': 'CSE',
+                'hod': 'Bench', 'purpose': 'Bench', 'seats': 50}
+
+    def toggle(booking_id):
+        # approve, reject, approve... on the same booking
+        action = 'reject' if toggles.get(booking_id) == 'approve' else 'approve'
+        toggles[booking_id] = action
+        return f'/{action}/{booking_id}'
+
+    def decisions():
+        action = 'reject' if toggles.get('batch') == 'approve' else 'approve'
+        toggles['batch'] = action
+        return {'decisions': [{'id': i, 'action': action} for i in pool[1:]]}
+
+    def cold_calendar():
+        app_module.calendar_feed_cache.clear()
+        return client.get('/calendar/Auditorium.ics').status_code
+
+    static_file = next((f for f in sorted(os.listdir(os.path.join(ROOT, 'static', 'images')))), None)
+    routes = {
+        'GET /': get('/'),
+        'GET /booking.html': get('/booking.html'),
+        'GET /principal.html': get('/principal.html'),
+        'GET /static/images': get(f'/static/images/{static_file}') if static_file else None,
+        'GET /health': get('/health'),
+        'GET /metrics': get('/metrics'),
+        'POST /signup': post(lambda: '/signup', lambda: {
+            'username': f'signup{next(counter)}', 'password': PASSWORD, 'email': f'signup{next(counter)}@bench.local',
+            'role': 'staff', 'department': 'CSE', 'full_name': 'Bench Signup'}),
+        'POST /login': post(lambda: '/login', lambda: {'username': f'bench{random.randrange(USERS)}', 'password': PASSWORD}),
+        'POST /reset-password': post(lambda: '/reset-password', lambda: {
+            'username': f'bench{random.randrange(2, USERS)}', 'new_password': PASSWORD, 'secret_code': 'staff@ciet'}),
+        'GET /assets': get('/assets', staff),
+        'POST /book': post(lambda: '/book', new_booking, staff),
+        'GET /bookings?limit=100': get('/bookings?limit=100', staff),
+        'GET /bookings?status=Pending': get('/bookings?status=Pending&limit=100', admin),
+        'GET /bookings?format=ndjson': get('/bookings?format=ndjson&limit=5000', admin),
+        'GET /public/bookings': get('/public/bookings?from=2024-01-01&limit=500'),
+        'GET /availability': get('/availability?hall=Auditorium&from=2024-01-01&days=366', staff),
+        'GET /stats': get('/stats', admin),
+        'POST /approve|reject': post(lambda: toggle(pool[0]), lambda: None, admin),
+        'POST /bookings/decisions': post(lambda: '/bookings/decisions', decisions, admin),
+        'POST /bookings/export/ics': post(lambda: '/bookings/export/ics', lambda: {'booking_ids': ids}, staff),
+        'GET /calendar/<hall>.ics (cold)': cold_calendar,
+        'GET /calendar/<hall>.ics (warm)': get('/calendar/Auditorium.ics'),
+    }
+    results = {}
+    for name, fn in routes.items():
+        if fn is not None:
+            record(results, name, fn)
+    return results
+
+
+# =============== LOAD SCENARIOS ===============
+
+def run_threads(app_module, worker, total):
+    # CONCURRENCY threads, each with its own test client, share `total` steps
+    latencies, outcomes, lock = [], Counter(), threading.Lock()
+    steps = iter(range(total))
+
+    def loop(seed):
+        client = app_module.app.test_client()
+        rng = random.Random(seed)
+        while True:
+            with lock:
+                step = next(steps, None)
+            if step is None:
+                return
+            start = time.perf_counter()
+            statuses = worker(client, rng, step)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                outcomes.update(str(s) for s in statuses)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(CONCURRENCY)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    result = summarize(latencies)
+    result.update({'wall_s': round(wall, 3), 'per_s': round(len(latencies) / wall, 1), 'statuses': dict(outcomes)})
+    return result
+
+
+def run_scenarios(db, app_module):
+    with app_module.app.app_context():
+        tokens = [{'Authorization': 'Bearer ' + app_module.issue_token(u)}
+                  for u in db['users'].find({'username': {'$regex': '^bench'}}).limit(USERS)]
+    admin = tokens[0]
+
+    def login_storm(client, rng, step):
+        body = {'username': f'bench{rng.randrange(USERS)}', 'password': PASSWORD}
+        return [client.post('/login', json=body).status_code]
+
+    def booking_burst(client, rng, step):
+        # Many users racing for a handful of slots: mostly conflicts
+        day = (datetime(2060, 1, 1) + timedelta(days=rng.randrange(20))).strftime('%Y-%m-%d')
+        body = {'hall': rng.choice(HALLS), 'fromDate': day, 'toDate': day, 'time': rng.choice(['FN', 'AN', 'Full']),
+                'dept': 'CSE', 'hod': 'Burst', 'purpose': 'Burst', 'seats': 10}
+        return [client.post('/book', json=body, headers=rng.choice(tokens)).status_code]
+
+    def dashboard_refresh(client, rng, step):
+        # What principal.html fetches on load
+        return [client.get(path, headers=admin).status_code for path in
+                ('/stats', '/bookings?status=Pending&limit=100', '/bookings?limit=100', '/assets')]
+
+    results = {}
+    for name, worker in [('login_storm', login_storm), ('booking_burst', booking_burst),
+                         ('dashboard_refresh', dashboard_refresh)]:
+        try:
+            results[name] = run_threads(app_module, worker, SCENARIO_REQUESTS)
+        except Exception as e:
+            results[name] = {'error': f'{type(e).__name__}: {e}'}
+        print(f"  {name}: {json.dumps(results[name], sort_keys=True)}")
+    return results
+
+
+# =============== COMPARE ===============
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['environment'].get('revision')} -> {new['environment'].get('revision')}  (p50 ms)")
+    for group, entries in new['results'].items():
+        for name, result in entries.items():
+            before = old['results'].get(group, {}).get(name, {}).get('p50_ms')
+            after = result.get('p50_ms')
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            flag = '⚠️ ' if change > 10 else '   '
+            print(f"{flag}{group:9} {name:40} {before:10.3f} {after:10.3f} {change:+7.1f}%")
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--compare':
+        compare(sys.argv[2], sys.argv[3])
+        return
+    config, app_module = load_app()
+    db = seed(config, app_module)
+    results = {}
+    runners = {'micro': run_micro, 'routes': run_routes, 'scenarios': run_scenarios}
+    for group in GROUPS:
+        print(group)
+        results[group] = runners[group](db, app_module)
+    write_results(OUTPUT, 'suite', results, size=BENCH_SIZE, series=BENCH_SERIES, iterations=ITERATIONS,
+                  concurrency=CONCURRENCY, scenario_requests=SCENARIO_REQUESTS, users=USERS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+# Static asset build: run once per deploy, before starting gunicorn.
+#
+#   python build_assets.py
+#
+# Writes everything to static/dist/:
+#   - every file under static/ copied to a content-hashed name
+#     (images/auditorium.png -> images/auditorium.3f9c1a2b7d.png), served
+#     with an immutable one-year cache
+#   - WebP/AVIF copies of each PNG/JPEG at 480px, 960px and full width
+#     (needs Pillow; skipped with a warning when it isn't installed)
+#   - every HTML page with its /static/... references rewritten to the
+#     hashed names, so browsers cache them for a year
+#   - .gz (and .br when the brotli package is installed) next to every
+#     HTML page and text asset
+#   - manifest.json mapping original paths to the built files
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+
+IMAGE_WIDTHS = (480, 960)
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+TEXT_EXTENSIONS = {'.html', '.css', '.js', '.svg', '.json', '.txt'}
+STATIC_REF = re.compile(rb'/static/([\w./-]+)')
+
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def precompress(path, data):
+    write(path + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write(path + '.br', brotli.compress(data, quality=11))
+
+
+def fingerprint_refs(html, files):
+    # /static/images/board.png -> /static/dist/images/board.3f9c1a2b7d.png
+    def replace(match):
+        path = match.group(1).decode()
+        return ('/static/' + files[path]).encode() if path in files else match.group(0)
+    return STATIC_REF.sub(replace, html)
+
+
+def image_formats():
+    formats = ['webp']
+    if features.check('avif'):
+        formats.append('avif')
+    return formats
+
+
+def build_image_variants(rel_path, source, manifest):
+    variants = {}
+    source_size = os.path.getsize(source)
+    with Image.open(source) as original:
+        original.load()
+        for fmt in image_formats():
+            variants[fmt] = {}
+            for width in IMAGE_WIDTHS + (None,):
+                if width and width >= original.width:
+                    continue
+                image = original
+                if width:
+                    height = round(original.height * width / original.width)
+                    image = original.resize((width, height), Image.LANCZOS)
+                stem, _ = os.path.splitext(rel_path)
+                tmp = os.path.join(DIST_DIR, f'{stem}.tmp.{fmt}')
+                os.makedirs(os.path.dirname(tmp), exist_ok=True)
+                image.save(tmp, fmt.upper(), quality=80)
+                with open(tmp, 'rb') as f:
+                    data = f.read()
+                os.remove(tmp)
+                if len(data) >= source_size:
+                    continue  # not worth serving over the original
+                suffix = f'-{width}' if width else ''
+                out_rel = f'{stem}{suffix}.{content_hash(data)}.{fmt}'
+                write(os.path.join(DIST_DIR, out_rel), data)
+                variants[fmt][str(width or original.width)] = 'dist/' + out_rel
+    manifest['images'][rel_path] = variants
+
+
+def build():
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    manifest = {'files': {}, 'images': {}, 'templates': []}
+    if brotli is None:
+        print("⚠️  brotli not installed, skipping .br copies (gzip only)")
+    if Image is not None and 'avif' not in image_formats():
+        print("⚠️  Pillow built without AVIF support, building WebP variants only")
+
+    for root, dirs, files in os.walk(STATIC_DIR):
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != DIST_DIR]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            rel_path = os.path.relpath(source, STATIC_DIR).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(rel_path)
+            out_rel = f'{stem}.{content_hash(data)}{ext}'
+            out_path = os.path.join(DIST_DIR, out_rel)
+            write(out_path, data)
+            manifest['files'][rel_path] = 'dist/' + out_rel
+            if ext.lower() in TEXT_EXTENSIONS:
+                precompress(out_path, data)
+            if ext.lower() in IMAGE_EXTENSIONS:
+                if Image is None:
+                    print(f"⚠️  Pillow not installed, skipping WebP/AVIF variants for {rel_path}")
+                else:
+                    build_image_variants(rel_path, source, manifest)
+
+    # HTML pages keep their URLs; the built copy points at hashed assets
+    for name in sorted(os.listdir(TEMPLATES_DIR)):
+        if name.endswith('.html'):
+            with open(os.path.join(TEMPLATES_DIR, name), 'rb') as f:
+                html = fingerprint_refs(f.read(), manifest['files'])
+            out_path = os.path.join(DIST_DIR, 'templates', name)
+            write(out_path, html)
+            precompress(out_path, html)
+            manifest['templates'].append(name)
+
+    write(os.path.join(DIST_DIR, 'manifest.json'), json.dumps(manifest, indent=2).encode())
+    print(f"✅ Built {len(manifest['files'])} assets, {len(manifest['images'])} image sets, "
+          f"{len(manifest['templates'])} pages into static/dist/")
+
+
+if __name__ == '__main__':
+    build()
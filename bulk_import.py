@@ -0,0 +1,215 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError
+
+from scheduling import (
+    ACTIVE_STATUSES, MAX_BOOKING_DAYS, SLOT_PARTS, claim_documents, format_date, normalize_recurrence,
+    occurrence_dates, overlap_clauses, parse_request_range, slot_mask, typed_fields
+)
+
+# Column aliases accepted in CSV headers / JSON keys
+FIELD_ALIASES = {'department': 'dept', 'slot': 'time', 'from': 'fromDate', 'to': 'toDate'}
+IMPORT_STATUSES = ['Pending', 'Approved']
+
+
+def parse_rows(payload, fmt):
+    # CSV text with a header row, or JSON: a list of rows or {"rows": [...]}
+    if fmt == 'csv':
+        rows = list(csv.DictReader(io.StringIO(payload)))
+    else:
+        data = json.loads(payload) if isinstance(payload, (str, bytes)) else payload
+        rows = data.get('rows', []) if isinstance(data, dict) else data
+    if not isinstance(rows, list):
+        raise ValueError('Expected a list of rows')
+    cleaned = []
+    for row in rows:
+        if not isinstance(row, dict):
+            raise ValueError('Every row must be an object')
+        cleaned.append({FIELD_ALIASES.get(k.strip(), k.strip()): v.strip() if isinstance(v, str) else v
+                        for k, v in row.items() if k})
+    return cleaned
+
+
+def row_recurrence(row):
+    # JSON rows carry a 'recurrence' object; CSV rows use flat columns:
+    #   repeat=weekly, until=2026-11-27, byweekday=MO;TH, interval=1, exdates=2026-08-14;...
+    if isinstance(row.get('recurrence'), dict):
+        return row['recurrence']
+    if not row.get('repeat'):
+        return None
+    split = lambda value: [v for v in str(value or '').replace(',', ';').split(';') if v.strip()]
+    raw = {'freq': row['repeat'], 'until': row.get('until'), 'interval': row.get('interval') or 1,
+           'exdates': [d.strip() for d in split(row.get('exdates'))]}
+    weekdays = [d.strip() for d in split(row.get('byweekday'))]
+    if weekdays:
+        raw['byweekday'] = [int(d) if d.isdigit() else d for d in weekdays]
+    return raw
+
+
+def build_booking(row, created_by, status, created_at, validate_hall):
+    # One import row -> booking document, or ValueError with the reason
+    if row.get('time') not in SLOT_PARTS:
+        raise ValueError('time must be FN, AN or Full')
+    invalid = validate_hall(row.get('hall'), row.get('seats'))
+    if invalid:
+        raise ValueError(invalid)
+    req_from, req_to = parse_request_range(row)
+    recurrence = row_recurrence(row)
+    if recurrence:
+        recurrence = normalize_recurrence(recurrence, req_from)
+        occurrences = list(occurrence_dates({'recurrence': recurrence}))
+        if not occurrences:
+            raise ValueError('Recurrence has no occurrences')
+        req_from, req_to = occurrences[0], occurrences[-1]
+    elif req_to < req_from:
+        raise ValueError('To Date cannot be before From Date')
+    elif (req_to - req_from).days >= MAX_BOOKING_DAYS:
+        raise ValueError(f'A booking cannot span more than {MAX_BOOKING_DAYS} days')
+    doc = {
+        '_id': ObjectId(),
+        'hall': row['hall'],
+        'date': format_date(req_from),
+        'fromDate': format_date(req_from),
+        'toDate': format_date(req_to),
+        'time': row['time'],
+        'department': row.get('dept'),
+        'hod': row.get('hod'),
+        'purpose': row.get('purpose'),
+        'seats': int(row['seats']) if str(row.get('seats') or '').isdigit() else row.get('seats'),
+        'details': row.get('details', ''),
+        'createdBy': created_by,
+        'status': status,
+        'createdAt': created_at
+    }
+    if recurrence:
+        doc['recurrence'] = recurrence
+    doc.update(typed_fields(doc))
+    return doc
+
+
+class Occupancy:
+    # (hall, day ordinal) -> slot bitmask, plus who holds each bit, built
+    # from one query for the whole batch. Every row is then checked and
+    # added with a few dict lookups per day instead of a query per row.
+
+    def __init__(self):
+        self._masks = {}
+        self._owners = {}
+
+    def add(self, hall, ordinals, mask, owner):
+        for day in ordinals:
+            key = (hall, day)
+            self._masks[key] = self._masks.get(key, 0) | mask
+            for bit in (1, 2):
+                if mask & bit:
+                    self._owners.setdefault((hall, day, bit), owner)
+
+    def clash(self, hall, ordinals, mask):
+        for day in ordinals:
+            taken = self._masks.get((hall, day), 0) & mask
+            if taken:
+                bit = 1 if taken & 1 else 2
+                return day, self._owners.get((hall, day, bit))
+        return None
+
+
+def load_occupancy(bookings, docs):
+    occupancy = Occupancy()
+    if not docs:
+        return occupancy
+    span_from = min(d['start'] for d in docs)
+    span_to = max(d['end'] for d in docs)
+    existing = bookings.find({
+        'hall': {'$in': list({d['hall'] for d in docs})},
+        'status': {'$in': ACTIVE_STATUSES},
+        '$or': overlap_clauses(span_from, span_to)
+    }, {'hall': 1, 'start': 1, 'end': 1, 'date': 1, 'fromDate': 1, 'toDate': 1, 'time': 1, 'recurrence': 1})
+    for b in existing:
+        try:
+            ordinals = [d.toordinal() for d in occurrence_dates(b)]
+        except (KeyError, TypeError, ValueError):
+            continue
+        occupancy.add(b['hall'], ordinals, slot_mask(b.get('time')), {'booking': b})
+    return occupancy
+
+
+def describe(owner, day):
+    date_str = format_date(datetime.fromordinal(day))
+    if 'row' in owner:
+        return f'Conflict detected! Overlaps row {owner["row"]} on {date_str}.'
+    return f'Conflict detected! Hall is already booked on {date_str} ({owner["booking"].get("time")}).'
+
+
+def import_bookings(db, rows, created_by, created_at, validate_hall, status='Pending', dry_run=False):
+    # Returns (per-row report, created booking documents)
+    if status not in IMPORT_STATUSES:
+        raise ValueError('status must be Pending or Approved')
+    report = [None] * len(rows)
+    docs, row_of = [], {}
+    for i, row in enumerate(rows):
+        try:
+            doc = build_booking(row, created_by, status, created_at, validate_hall)
+        except (KeyError, TypeError, ValueError) as e:
+            report[i] = {'row': i + 1, 'status': 'invalid', 'message': str(e) or 'Missing field'}
+            continue
+        docs.append(doc)
+        row_of[doc['_id']] = i
+
+    # 1. Sweep rows in file order against existing bookings and earlier rows
+    occupancy = load_occupancy(db['bookings'], docs)
+    accepted = []
+    for doc in docs:
+        i = row_of[doc['_id']]
+        ordinals = [d.toordinal() for d in occurrence_dates(doc)]
+        mask = doc['slotMask']
+        clash = occupancy.clash(doc['hall'], ordinals, mask)
+        if clash:
+            report[i] = {'row': i + 1, 'status': 'conflict', 'message': describe(clash[1], clash[0])}
+            continue
+        occupancy.add(doc['hall'], ordinals, mask, {'row': i + 1})
+        accepted.append(doc)
+
+    if dry_run:
+        for doc in accepted:
+            i = row_of[doc['_id']]
+            report[i] = {'row': i + 1, 'status': 'ok'}
+        return report, []
+
+    # 2. Claim every cell in one unordered insert_many; a claim lost to a
+    #    concurrent /book knocks out that whole booking
+    claims = []
+    for doc in accepted:
+        claims.extend(claim_documents(doc))
+    lost = set()
+    if claims:
+        try:
+            db['slot_claims'].insert_many(claims, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                lost.add(claims[error['index']]['bookingId'])
+            db['slot_claims'].delete_many({'bookingId': {'$in': list(lost)}})
+    created = [doc for doc in accepted if doc['_id'] not in lost]
+    for doc in accepted:
+        if doc['_id'] in lost:
+            i = row_of[doc['_id']]
+            report[i] = {'row': i + 1, 'status': 'conflict',
+                         'message': 'Conflict detected! A slot was booked while importing.'}
+
+    # 3. Bookings themselves in one insert_many
+    if created:
+        db['bookings'].insert_many(created, ordered=False)
+    for doc in created:
+        i = row_of[doc['_id']]
+        report[i] = {'row': i + 1, 'status': 'created', 'id': str(doc['_id'])}
+    return report, created
+
+
+def summarize_report(report):
+    summary = {}
+    for entry in report:
+        summary[entry['status']] = summary.get(entry['status'], 0) + 1
+    return summary
@@ -0,0 +1,110 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    # Small thread-safe LRU cache whose entries expire after `ttl` seconds.
+    # Used for per-worker caches that booking/asset writes invalidate.
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+class RedisCache:
+    # Same interface as TTLCache, backed by Redis so every worker (and
+    # every server) sees one copy and one invalidation. Values are pickled;
+    # only the app itself writes to these keys.
+
+    def __init__(self, url, ttl, namespace):
+        import redis
+        self.ttl = ttl
+        self.namespace = namespace
+        self._redis = redis.Redis.from_url(url)
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key):
+        return f'{self.namespace}:{key}'
+
+    def get(self, key, default=None):
+        raw = self._redis.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(self._key(key), pickle.dumps(value), ex=max(int(self.ttl if ttl is None else ttl), 1))
+
+    def get_or_set(self, key, factory):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value)
+        return value
+
+    def delete(self, key):
+        self._redis.delete(self._key(key))
+
+    def clear(self):
+        keys = list(self._redis.scan_iter(match=self._key('*')))
+        if keys:
+            self._redis.delete(*keys)
+
+    def stats(self):
+        return {'backend': 'redis', 'hits': self.hits, 'misses': self.misses}
+
+
+def make_cache(ttl, maxsize=1024, namespace='cache', url=None):
+    # CACHE_URL=redis://... shares the cache between workers; without it
+    # each worker keeps its own TTLCache
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url, ttl, namespace)
+    return TTLCache(ttl, maxsize=maxsize)
@@ -0,0 +1,61 @@
+import hashlib
+import json
+
+CATALOG_KEY = 'assets'
+
+
+def hall_seats(asset):
+    try:
+        return int(asset.get('seats'))
+    except (TypeError, ValueError):
+        return None
+
+
+class AssetCatalog:
+    # Read-through cache of the hall catalog. The assets collection is
+    # read once, serialized once, and the same entry serves GET /assets
+    # (JSON bytes + ETag) and hall lookups in create_booking. Asset writes
+    # call invalidate(); the cache TTL bounds staleness in other workers
+    # when the backend is per-process.
+
+    def __init__(self, get_database, cache):
+        self._get_database = get_database
+        self._cache = cache
+
+    def _load(self):
+        assets = list(self._get_database()['assets'].find())
+        for a in assets:
+            a['_id'] = str(a['_id'])
+        body = json.dumps({'items': assets}, sort_keys=True, separators=(',', ':'), default=str).encode()
+        return {
+            'body': body,
+            'etag': hashlib.sha1(body).hexdigest(),
+            'halls': {a.get('name'): a for a in assets}
+        }
+
+    def entry(self):
+        return self._cache.get_or_set(CATALOG_KEY, self._load)
+
+    def get_hall(self, name):
+        return self.entry()['halls'].get(name)
+
+    def validate_booking(self, hall, seats):
+        # Returns an error message, or None if the hall exists and fits
+        asset = self.get_hall(hall)
+        if not asset:
+            return f'Unknown hall: {hall}'
+        if seats in (None, ''):
+            return None
+        try:
+            seats = int(seats)
+        except (TypeError, ValueError):
+            return 'seats must be a number'
+        if seats < 1:
+            return 'seats must be at least 1'
+        capacity = hall_seats(asset)
+        if capacity is not None and seats > capacity:
+            return f'{hall} seats at most {capacity}'
+        return None
+
+    def invalidate(self):
+        self._cache.delete(CATALOG_KEY)
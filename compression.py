@@ -0,0 +1,58 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# On-the-fly compression for dynamic responses (JSON, NDJSON pages, .ics).
+# Static files are precompressed at build time and served by assets.py,
+# so anything already carrying a Content-Encoding is left alone, as are
+# streamed responses (SSE, NDJSON streams) that must not be buffered.
+# Brotli is used when the `brotli` package is installed and the client
+# asks for it, gzip otherwise.
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'text/calendar', 'text/csv', 'text/html', 'text/plain', 'image/svg+xml'
+)
+
+
+def negotiate(accept_encodings):
+    if brotli is not None and accept_encodings['br']:
+        return 'br'
+    if accept_encodings['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=4):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def init_app(app, min_size=1024, gzip_level=6, brotli_quality=4):
+    @app.after_request
+    def _compress(response):
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compress(data, encoding, gzip_level, brotli_quality))
+        response.headers['Content-Encoding'] = encoding
+        # Same resource, different bytes: a strong ETag must not be reused
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,7 +1,10 @@
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import IndexModel, MongoClient, monitoring
 from datetime import timedelta
+from metrics import command_metrics
 
 load_dotenv()
 
@@ -10,6 +13,84 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'change-me-in-production')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=30)
     MONGO_URI = os.getenv('MONGO_URI', 'mongodb://localhost:27017/ciet_hall_booking')
+    MONGO_DB_NAME = os.getenv('MONGO_DB_NAME', 'ciet_hall_booking')
+    # Connection pool settings (one pool per worker process)
+    MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', 20))
+    MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv('MONGO_MAX_IDLE_TIME_MS', 300000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv('MONGO_SOCKET_TIMEOUT_MS', 20000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+    # How often each worker reloads its in-memory availability index
+    AVAILABILITY_REFRESH_SECONDS = int(os.getenv('AVAILABILITY_REFRESH_SECONDS', 30))
+    # bcrypt work factor and the per-worker hashing pool
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))
+    # How long each worker trusts its cached user role / token version
+    ROLE_CACHE_SECONDS = int(os.getenv('ROLE_CACHE_SECONDS', 60))
+    # MongoDB commands slower than this are logged with their query shape
+    SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', 100))
+    # Lifetime of the cached /stats payload in each worker
+    STATS_CACHE_SECONDS = int(os.getenv('STATS_CACHE_SECONDS', 15))
+    # Per-hall .ics feeds: cache lifetime and how far back they reach
+    CALENDAR_CACHE_SECONDS = int(os.getenv('CALENDAR_CACHE_SECONDS', 300))
+    CALENDAR_FEED_PAST_DAYS = int(os.getenv('CALENDAR_FEED_PAST_DAYS', 90))
+    # Hall catalog cache: lifetime, and an optional shared backend
+    # (redis://...) so asset edits invalidate every worker at once
+    CATALOG_CACHE_SECONDS = int(os.getenv('CATALOG_CACHE_SECONDS', 300))
+    CACHE_URL = os.getenv('CACHE_URL', '')
+    # Live availability (SSE). Every open stream holds a whole sync
+    # worker, so LIVE_UPDATES=auto only serves streams under gevent
+    # (ASYNC_MODE=1); 1 forces them on (threaded dev server), 0 off.
+    # Then: per-worker subscriber cap, replay buffer, keep-alive interval,
+    # how long one stream stays open before the client reconnects, and
+    # whether to follow the MongoDB change stream
+    LIVE_UPDATES = os.getenv('LIVE_UPDATES', 'auto')
+    LIVE_MAX_SUBSCRIBERS = int(os.getenv('LIVE_MAX_SUBSCRIBERS', 5000))
+    LIVE_BUFFER_SIZE = int(os.getenv('LIVE_BUFFER_SIZE', 1024))
+    LIVE_HEARTBEAT_SECONDS = int(os.getenv('LIVE_HEARTBEAT_SECONDS', 15))
+    LIVE_STREAM_SECONDS = int(os.getenv('LIVE_STREAM_SECONDS', 25))
+    LIVE_CHANGE_STREAMS = os.getenv('LIVE_CHANGE_STREAMS', '1') == '1'
+    # Upper bound on one POST /bookings/import (or CLI import) batch
+    MAX_IMPORT_ROWS = int(os.getenv('MAX_IMPORT_ROWS', 10000))
+    # Background jobs: pool size per worker, durable queue in the `jobs`
+    # collection (shared by all workers, survives restarts), retry policy,
+    # and the largest result (e.g. an .ics export) a job may keep
+    JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+    JOB_QUEUE_DURABLE = os.getenv('JOB_QUEUE_DURABLE', '0') == '1'
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+    JOB_BACKOFF_SECONDS = float(os.getenv('JOB_BACKOFF_SECONDS', 2))
+    JOB_RESULT_MAX_BYTES = int(os.getenv('JOB_RESULT_MAX_BYTES', 8 * 1024 * 1024))
+    # Outgoing mail for booking decisions (unset SMTP_HOST = log only;
+    # `python smtp_sink.py` is a local stand-in on port 1025)
+    SMTP_HOST = os.getenv('SMTP_HOST', '')
+    SMTP_PORT = int(os.getenv('SMTP_PORT', 25))
+    SMTP_USERNAME = os.getenv('SMTP_USERNAME', '')
+    SMTP_PASSWORD = os.getenv('SMTP_PASSWORD', '')
+    SMTP_STARTTLS = os.getenv('SMTP_STARTTLS', '0') == '1'
+    SMTP_FROM = os.getenv('SMTP_FROM', 'CIET Hall Booking <noreply@ciet.edu>')
+    SMTP_TIMEOUT = int(os.getenv('SMTP_TIMEOUT', 10))
+    # Response compression for JSON/.ics bodies of at least
+    # COMPRESS_MIN_BYTES (brotli when installed and accepted, else gzip)
+    COMPRESS_RESPONSES = os.getenv('COMPRESS_RESPONSES', '1') == '1'
+    COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+    # Archival: bookings that ended more than ARCHIVE_AFTER_DAYS ago move
+    # to `bookings_archive` (keep it above CALENDAR_FEED_PAST_DAYS), in
+    # batches, every ARCHIVE_INTERVAL_HOURS through the job queue
+    # (0 = only via `flask db archive-bookings`)
+    ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', 180))
+    ARCHIVE_INTERVAL_HOURS = float(os.getenv('ARCHIVE_INTERVAL_HOURS', 0))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 1000))
+    # Archive totals change only when archival runs; /stats reuses them
+    ARCHIVE_STATS_CACHE_SECONDS = int(os.getenv('ARCHIVE_STATS_CACHE_SECONDS', 3600))
+    # Upper bound on one POST /bookings/decisions batch
+    MAX_DECISIONS_PER_REQUEST = int(os.getenv('MAX_DECISIONS_PER_REQUEST', 1000))
+    # Default page size for the unauthenticated /public/bookings endpoint
+    PUBLIC_PAGE_SIZE = int(os.getenv('PUBLIC_PAGE_SIZE', 200))
     CORS_ORIGINS = [
         'http://localhost:3000',
         'http://localhost:5000',
@@ -20,26 +101,196 @@ class Config:
         'https://*.onrender.com'
     ]
 
+
+# =============== CONNECTION POOL ===============
+# One MongoClient per worker process. MongoClient is thread-safe and keeps
+# its own connection pool, but it must not be shared across fork(), so the
+# owning pid is remembered and a fresh client is built in each child.
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.checkout_failures = 0
+            self.checked_out = 0
+            self.open_connections = 0
+            self.wait_time_total = 0.0
+            self.wait_time_max = 0.0
+            self.pools_cleared = 0
+
+    def snapshot(self):
+        with self._lock:
+            avg_wait = self.wait_time_total / self.checkouts if self.checkouts else 0.0
+            return {
+                'checkouts': self.checkouts,
+                'checkout_failures': self.checkout_failures,
+                'checked_out': self.checked_out,
+                'open_connections': self.open_connections,
+                'wait_time_total_ms': round(self.wait_time_total * 1000, 3),
+                'wait_time_avg_ms': round(avg_wait * 1000, 3),
+                'wait_time_max_ms': round(self.wait_time_max * 1000, 3),
+                'pools_cleared': self.pools_cleared
+            }
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        waited = time.perf_counter() - getattr(self._local, 'started', time.perf_counter())
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(self.open_connections - 1, 0)
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+pool_stats = PoolStats()
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
 def get_mongo_client():
-    try:
-        client = MongoClient(Config.MONGO_URI, serverSelectionTimeoutMS=5000)
-        client.admin.command('ping')
-        print("✅ MongoDB Atlas connected!")
-        return client
-    except Exception as e:
-        print(f"❌ MongoDB connection failed: {e}")
-        raise
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            # connect=False defers the first socket until the first operation,
+            # so building the client never blocks worker startup.
+            _client = MongoClient(
+                Config.MONGO_URI,
+                maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=Config.MONGO_MAX_IDLE_TIME_MS,
+                connectTimeoutMS=Config.MONGO_CONNECT_TIMEOUT_MS,
+                socketTimeoutMS=Config.MONGO_SOCKET_TIMEOUT_MS,
+                serverSelectionTimeoutMS=Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                waitQueueTimeoutMS=Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                event_listeners=[pool_stats, command_metrics],
+                connect=False
+            )
+            _client_pid = pid
+            pool_stats.reset()
+    return _client
+
+
+def close_mongo_client():
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
+
+
+def get_pool_stats():
+    stats = pool_stats.snapshot()
+    stats['pid'] = os.getpid()
+    stats['max_pool_size'] = Config.MONGO_MAX_POOL_SIZE
+    return stats
+
+
+def ping_database():
+    get_mongo_client().admin.command('ping')
+
 
 def get_database():
     client = get_mongo_client()
-    return client['ciet_hall_booking']
+    return client[Config.MONGO_DB_NAME]
+
+INDEXES = {
+    'users': [
+        IndexModel('username', unique=True),
+        IndexModel('email', unique=True)
+    ],
+    'bookings': [
+        IndexModel([('date', 1), ('time', 1), ('hall', 1)]),
+        # Conflict checks on the typed fields (see scheduling.typed_fields)
+        IndexModel([('hall', 1), ('status', 1), ('slotMask', 1), ('start', 1), ('end', 1)]),
+        # Recurring series only: they can start before the conflict query's
+        # start lower bound, so they are found by their last occurrence
+        IndexModel([('hall', 1), ('status', 1), ('end', 1)], name='series_hall_status_end',
+                   partialFilterExpression={'recurrence': {'$exists': True}}),
+        # Upcoming bookings (availability index, calendar feeds)
+        IndexModel([('status', 1), ('end', 1)]),
+        # String-date shapes, used until the typed-dates migration has run
+        IndexModel([('hall', 1), ('status', 1), ('fromDate', 1), ('toDate', 1)]),
+        IndexModel('createdBy'),
+        IndexModel('status'),
+        IndexModel('createdAt'),
+        IndexModel([('createdAt', -1), ('_id', -1)]),
+        IndexModel([('status', 1), ('createdAt', -1), ('_id', -1)]),
+        # Archival sweep
+        IndexModel('end')
+    ],
+    # Same listing shapes as the hot collection, for ?include_archived=1
+    'bookings_archive': [
+        IndexModel([('createdAt', -1), ('_id', -1)]),
+        IndexModel([('status', 1), ('createdAt', -1), ('_id', -1)]),
+        IndexModel([('createdBy', 1), ('createdAt', -1)]),
+        IndexModel([('hall', 1), ('date', 1)])
+    ],
+    'jobs': [
+        IndexModel([('status', 1), ('runAt', 1)]),
+        # Finished jobs (and their results) are dropped after a week
+        IndexModel('finishedAt', expireAfterSeconds=7 * 24 * 3600)
+    ],
+    'slot_claims': [
+        IndexModel([('hall', 1), ('date', 1), ('slot', 1)], unique=True),
+        IndexModel('bookingId')
+    ]
+}
+
+
+def ensure_indexes(db):
+    # Only the missing indexes are sent, one createIndexes per collection
+    created = 0
+    for collection, models in INDEXES.items():
+        existing = set(db[collection].index_information())
+        missing = [m for m in models if m.document['name'] not in existing]
+        if missing:
+            db[collection].create_indexes(missing)
+            created += len(missing)
+    return created
+
 
 def init_db():
-    db = get_database()
-    db.users.create_index('username', unique=True)
-    db.users.create_index('email', unique=True)
-    db.bookings.create_index([('date', 1), ('time', 1), ('hall', 1)])
-    db.bookings.create_index('createdBy')
-    db.bookings.create_index('status')
-    db.bookings.create_index('createdAt')
-    print("✅ Database indexes created!")
+    ping_database()
+    created = ensure_indexes(get_database())
+    print(f"✅ Database indexes ready ({created} created)")
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+# gunicorn -c gunicorn.conf.py app:app
+#
+# ASYNC_MODE=1 switches to gevent workers. gevent monkey-patches sockets,
+# so every pymongo round trip yields to other requests instead of blocking
+# the worker, and one worker serves up to WORKER_CONNECTIONS clients with
+# the same routes and response contracts as the sync workers.
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+if os.getenv('ASYNC_MODE') == '1':
+    worker_class = 'gevent'
+    worker_connections = int(os.getenv('WORKER_CONNECTIONS', 1000))
+    # Many concurrent greenlets share one Mongo pool per worker; give it
+    # room so they don't all queue on a handful of sockets
+    os.environ.setdefault('MONGO_MAX_POOL_SIZE', '100')
+    os.environ.setdefault('MONGO_WAIT_QUEUE_TIMEOUT_MS', '10000')
+    # Idle SSE streams are cheap greenlets here, keep them open longer
+    os.environ.setdefault('LIVE_STREAM_SECONDS', '600')
+else:
+    worker_class = 'sync'
+
+
+def on_starting(server):
+    # BOOTSTRAP_ON_START=1 runs `flask db bootstrap` once before the
+    # workers start, in a child process: importing the app here would hand
+    # every worker a copy created before gevent patches threading, whose
+    # locks would then block the whole worker instead of one greenlet
+    if os.getenv('BOOTSTRAP_ON_START') == '1':
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'db', 'bootstrap'],
+                       cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from bson.errors import InvalidId
+from bson.objectid import ObjectId
+from icalendar import Calendar, Event
+
+from scheduling import WEEKDAY_CODES, booking_range, parse_date
+
+# Start/end hour for each slot
+SLOT_HOURS = {
+    'FN': (9, 13),
+    'AN': (14, 18),
+    'Full': (9, 18)
+}
+
+ICS_PROJECTION = {
+    'hall': 1, 'date': 1, 'fromDate': 1, 'toDate': 1, 'time': 1,
+    'purpose': 1, 'department': 1, 'hod': 1, 'seats': 1, 'recurrence': 1
+}
+ICS_BATCH_SIZE = 500
+
+
+def parse_object_ids(values):
+    ids = []
+    for value in values:
+        try:
+            ids.append(ObjectId(value))
+        except (InvalidId, TypeError):
+            print(f"Error processing booking {value}: invalid id")
+    return ids
+
+
+def _event(booking, day, dtstamp, uid):
+    start_hour, end_hour = SLOT_HOURS.get(booking.get('time'), SLOT_HOURS['Full'])
+    event = Event()
+    event.add('summary', f"{booking['hall']} - {booking.get('purpose', '')}")
+    event.add('dtstart', day.replace(hour=start_hour, minute=0))
+    event.add('dtend', day.replace(hour=end_hour, minute=0))
+    event.add('dtstamp', dtstamp)
+    event.add('location', f"CIET {booking['hall']}")
+    event.add('description', f"Dept: {booking.get('department')}\nHOD: {booking.get('hod')}\nSeats: {booking.get('seats')}")
+    event.add('status', 'CONFIRMED')
+    event.add('uid', uid)
+    return event
+
+
+def series_event(booking, dtstamp):
+    # A recurring series is exported as it is stored: one event with an RRULE
+    recurrence = booking['recurrence']
+    b_from, _ = booking_range(booking)
+    start_hour = SLOT_HOURS.get(booking.get('time'), SLOT_HOURS['Full'])[0]
+    event = _event(booking, b_from, dtstamp, str(booking['_id']) + '@ciet.edu')
+    rule = {
+        'freq': recurrence['freq'].upper(),
+        'interval': recurrence.get('interval', 1),
+        'until': parse_date(recurrence['until']).replace(hour=23, minute=59)
+    }
+    if recurrence['freq'] == 'weekly':
+        rule['byday'] = [WEEKDAY_CODES[d] for d in recurrence['byweekday']]
+        rule['wkst'] = 'MO'
+    event.add('rrule', rule)
+    exdates = [parse_date(d).replace(hour=start_hour) for d in recurrence.get('exdates', [])]
+    if exdates:
+        event.add('exdate', exdates)
+    return event
+
+
+def booking_events(booking, dtstamp):
+    if booking.get('recurrence'):
+        yield series_event(booking, dtstamp)
+        return
+    # One VEVENT per day: a multi-day booking occupies the same slot daily
+    b_from, b_to = booking_range(booking)
+    multi_day = b_to > b_from
+    day = b_from
+    while day <= b_to:
+        if multi_day:
+            uid = f"{booking['_id']}-{day.strftime('%Y%m%d')}@ciet.edu"
+        else:
+            uid = str(booking['_id']) + '@ciet.edu'
+        yield _event(booking, day, dtstamp, uid)
+        day += timedelta(days=1)
+
+
+def calendar_frame(name):
+    # Header and footer of an empty VCALENDAR, so events can be streamed
+    # between them without building the whole Calendar in memory
+    cal = Calendar()
+    cal.add('prodid', '-//CIET Hall Booking System//EN')
+    cal.add('version', '2.0')
+    cal.add('calscale', 'GREGORIAN')
+    cal.add('method', 'PUBLISH')
+    cal.add('x-wr-calname', name)
+    cal.add('x-wr-timezone', 'Asia/Kolkata')
+    footer = b'END:VCALENDAR\r\n'
+    return cal.to_ical()[:-len(footer)], footer
+
+
+def iter_calendar(bookings, name, dtstamp):
+    header, footer = calendar_frame(name)
+    yield header
+    for booking in bookings:
+        try:
+            yield b''.join(event.to_ical() for event in booking_events(booking, dtstamp))
+        except Exception as e:
+            print(f"Error processing booking {booking.get('_id')}: {e}")
+    yield footer
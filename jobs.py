@@ -0,0 +1,263 @@
+import heapq
+import itertools
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from bson.binary import Binary
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+import metrics
+
+FINISHED = ('succeeded', 'failed')
+
+
+class JobQueue:
+    # Runs slow side effects (emails, exports) off the request path.
+    #
+    # In-process mode keeps jobs in a heap ordered by run time and hands
+    # them to a small pool of worker threads (greenlets under gevent).
+    # Durable mode stores them in the `jobs` collection instead: any worker
+    # process claims the next due job with find_one_and_update, so queued
+    # jobs survive restarts and are shared across workers.
+    #
+    # A failed attempt is retried after backoff * 2^(attempt-1) seconds
+    # until max_attempts, then marked failed with the last error.
+
+    def __init__(self, get_database, workers=2, durable=False, max_attempts=5, backoff=2.0,
+                 poll_seconds=1.0, lease_seconds=300, max_jobs=10000):
+        self._get_database = get_database
+        self.workers = workers
+        self.durable = durable
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._handlers = {}
+        self._jobs = OrderedDict()
+        self._max_jobs = max_jobs
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stopping = False
+        self.running = 0
+
+    # ---------- registration / submission ----------
+
+    def task(self, name):
+        def register(fn):
+            self._handlers[name] = fn
+            return fn
+        return register
+
+    def enqueue(self, name, payload=None, owner=None, max_attempts=None, delay=0):
+        return self.enqueue_many(name, [payload], owner=owner, max_attempts=max_attempts, delay=delay)[0]
+
+    def enqueue_many(self, name, payloads, owner=None, max_attempts=None, delay=0):
+        # One insert_many in durable mode, however many jobs
+        if name not in self._handlers:
+            raise ValueError(f'Unknown job: {name}')
+        if not payloads:
+            return []
+        now = datetime.utcnow()
+        jobs = [{
+            '_id': ObjectId(),
+            'name': name,
+            'payload': payload or {},
+            'owner': owner,
+            'status': 'queued',
+            'attempts': 0,
+            'maxAttempts': max_attempts or self.max_attempts,
+            'runAt': now + timedelta(seconds=delay),
+            'createdAt': now
+        } for payload in payloads]
+        self.start()
+        if self.durable:
+            self._collection().insert_many(jobs)
+            with self._cond:
+                self._cond.notify(len(jobs))
+        else:
+            with self._cond:
+                for job in jobs:
+                    self._remember(job)
+                    heapq.heappush(self._heap, (job['runAt'], next(self._seq), job['_id']))
+                self._cond.notify(len(jobs))
+        return [str(job['_id']) for job in jobs]
+
+    def get(self, job_id):
+        try:
+            job_id = ObjectId(job_id)
+        except Exception:
+            return None
+        if self.durable:
+            return self._collection().find_one({'_id': job_id})
+        with self._cond:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        with self._cond:
+            if self.durable:
+                queued = None
+            else:
+                queued = sum(1 for j in self._jobs.values() if j['status'] == 'queued')
+            return {'workers': self.workers, 'running': self.running, 'queued': queued, 'durable': self.durable}
+
+    def pending(self, name):
+        # Is a job of this kind already waiting to run?
+        if self.durable:
+            return self._collection().find_one({'name': name, 'status': 'queued'}, {'_id': 1}) is not None
+        with self._cond:
+            return any(j['name'] == name and j['status'] == 'queued' for j in self._jobs.values())
+
+    def queued_count(self):
+        if not self.durable:
+            return self.stats()['queued']
+        try:
+            return self._collection().count_documents({'status': 'queued'})
+        except PyMongoError:
+            return -1
+
+    # ---------- workers ----------
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            self._stopping = False
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def shutdown(self, timeout=5):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _collection(self):
+        return self._get_database()['jobs']
+
+    def _remember(self, job):
+        self._jobs[job['_id']] = job
+        while len(self._jobs) > self._max_jobs:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest['status'] not in FINISHED:
+                break
+            del self._jobs[oldest_id]
+
+    def _next_local(self):
+        with self._cond:
+            while not self._stopping:
+                now = datetime.utcnow()
+                if self._heap and self._heap[0][0] <= now:
+                    _, _, job_id = heapq.heappop(self._heap)
+                    job = self._jobs.get(job_id)
+                    if job is None:
+                        continue
+                    job.update(status='running', startedAt=now)
+                    job['attempts'] += 1
+                    self.running += 1
+                    return job
+                wait = self.poll_seconds
+                if self._heap:
+                    wait = min(wait, (self._heap[0][0] - now).total_seconds())
+                self._cond.wait(max(wait, 0.01))
+        return None
+
+    def _next_durable(self):
+        while not self._stopping:
+            now = datetime.utcnow()
+            try:
+                job = self._collection().find_one_and_update(
+                    {'$or': [
+                        {'status': 'queued', 'runAt': {'$lte': now}},
+                        # Lease expired: the worker running it died
+                        {'status': 'running', 'leaseUntil': {'$lt': now}}
+                    ]},
+                    {'$set': {'status': 'running', 'startedAt': now,
+                              'leaseUntil': now + timedelta(seconds=self.lease_seconds)},
+                     '$inc': {'attempts': 1}},
+                    sort=[('runAt', 1)],
+                    return_document=ReturnDocument.AFTER
+                )
+            except PyMongoError as e:
+                print(f"❌ Job queue poll error: {e}")
+                job = None
+            if job:
+                with self._cond:
+                    self.running += 1
+                return job
+            with self._cond:
+                self._cond.wait(self.poll_seconds)
+        return None
+
+    def _work(self):
+        while True:
+            job = self._next_durable() if self.durable else self._next_local()
+            if job is None:
+                return
+            self._run(job)
+
+    def _run(self, job):
+        name = job['name']
+        start = time.perf_counter()
+        update = {}
+        try:
+            result = self._handlers[name](**job['payload'])
+            update = {'status': 'succeeded', 'finishedAt': datetime.utcnow(), 'error': None}
+            if result is not None:
+                update['result'] = Binary(result) if isinstance(result, bytes) and self.durable else result
+            outcome = 'succeeded'
+        except Exception as e:
+            error = f'{type(e).__name__}: {e}'
+            if job['attempts'] < job['maxAttempts']:
+                delay = self.backoff * 2 ** (job['attempts'] - 1)
+                update = {'status': 'queued', 'runAt': datetime.utcnow() + timedelta(seconds=delay), 'error': error}
+                outcome = 'retried'
+                print(f"⚠️ Job {name} {job['_id']} failed (attempt {job['attempts']}), retrying in {delay:g}s: {error}")
+            else:
+                update = {'status': 'failed', 'finishedAt': datetime.utcnow(), 'error': error}
+                outcome = 'failed'
+                print(f"❌ Job {name} {job['_id']} failed for good: {error}")
+                traceback.print_exc()
+        metrics.job_latency.observe(time.perf_counter() - start, name)
+        metrics.jobs_finished.inc(name, outcome)
+
+        if self.durable:
+            try:
+                self._collection().update_one({'_id': job['_id']}, {'$set': update, '$unset': {'leaseUntil': ''}})
+            except PyMongoError as e:
+                print(f"❌ Job {name} {job['_id']} status update failed: {e}")
+        with self._cond:
+            self.running -= 1
+            if not self.durable:
+                job.update(update)
+                if update['status'] == 'queued':
+                    heapq.heappush(self._heap, (job['runAt'], next(self._seq), job['_id']))
+                    self._cond.notify()
+
+
+def job_summary(job):
+    # Public view of a job for GET /jobs/<id>
+    summary = {
+        'id': str(job['_id']),
+        'name': job['name'],
+        'status': job['status'],
+        'attempts': job.get('attempts', 0),
+        'maxAttempts': job.get('maxAttempts'),
+        'createdAt': job.get('createdAt'),
+        'finishedAt': job.get('finishedAt'),
+        'error': job.get('error')
+    }
+    if job['status'] == 'succeeded' and job.get('result') is not None:
+        summary['result'] = f"/jobs/{job['_id']}/result"
+    return summary
@@ -0,0 +1,191 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from scheduling import booking_range, format_date
+
+
+def live_updates_enabled(setting):
+    # 'auto': only when gevent has patched threading, i.e. an async worker
+    # where an idle stream costs a greenlet rather than a whole worker
+    if setting != 'auto':
+        return setting == '1'
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def booking_event(booking):
+    # Compact delta: which hall/days/slot changed and to what status
+    b_from, b_to = booking_range(booking)
+    event = {
+        'booking': str(booking['_id']),
+        'hall': booking.get('hall'),
+        'from': format_date(b_from),
+        'to': format_date(b_to),
+        'slot': booking.get('time'),
+        'status': booking.get('status')
+    }
+    if booking.get('recurrence'):
+        event['recurring'] = True
+    return event
+
+
+class EventBus:
+    # In-process pub/sub for SSE subscribers. Events go into a bounded ring
+    # buffer with increasing ids; subscribers all wait on one Condition and
+    # read whatever is newer than their last id. Nothing is held per
+    # subscriber, so under gevent workers thousands of idle streams are
+    # just parked greenlets.
+
+    def __init__(self, size=1024):
+        self._events = deque(maxlen=size)
+        self._cond = threading.Condition()
+        self._next_id = 1
+        # Ids only mean something to the worker that issued them; the
+        # epoch lets a reconnect that lands on another worker be detected
+        self.epoch = os.urandom(4).hex()
+        self.subscribers = 0
+        self.published = 0
+
+    @property
+    def last_id(self):
+        with self._cond:
+            return self._next_id - 1
+
+    def publish(self, event):
+        with self._cond:
+            event = dict(event, id=self._next_id)
+            self._next_id += 1
+            self._events.append(event)
+            self.published += 1
+            self._cond.notify_all()
+        return event
+
+    def _since(self, last_id):
+        # None means last_id fell out of the buffer: the client must resync
+        if self._events and last_id < self._events[0]['id'] - 1:
+            return None
+        return [e for e in self._events if e['id'] > last_id]
+
+    def wait(self, last_id, timeout):
+        # Events after last_id, [] on timeout, None if the client missed some
+        with self._cond:
+            events = self._since(last_id)
+            if events == []:
+                self._cond.wait(timeout)
+                events = self._since(last_id)
+            return events
+
+    def subscribe(self, max_subscribers):
+        with self._cond:
+            if self.subscribers >= max_subscribers:
+                return False
+            self.subscribers += 1
+            return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers -= 1
+
+    def stats(self):
+        with self._cond:
+            return {'subscribers': self.subscribers, 'published': self.published, 'last_id': self._next_id - 1}
+
+
+class ChangeStreamFeed:
+    # Tails the bookings change stream in a background thread so every
+    # worker sees every worker's writes. Only works on a replica set; on a
+    # standalone mongod the first watch() fails and the feed stays
+    # inactive, leaving the app to publish its own writes locally.
+
+    PIPELINE = [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}]
+    UNSUPPORTED_CODES = {40573, 136}
+
+    def __init__(self, get_database, on_change):
+        self._get_database = get_database
+        self._on_change = on_change
+        self._lock = threading.Lock()
+        self._thread = None
+        self._resume_token = None
+        self.active = False
+        self.unsupported = False
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None or self.unsupported:
+                return
+            self._thread = threading.Thread(target=self._run, name='bookings-change-stream', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                collection = self._get_database()['bookings']
+                with collection.watch(self.PIPELINE, full_document='updateLookup',
+                                      resume_after=self._resume_token) as stream:
+                    self.active = True
+                    print("✅ Live updates: following the bookings change stream")
+                    for change in stream:
+                        self._resume_token = stream.resume_token
+                        booking = change.get('fullDocument')
+                        if booking:
+                            try:
+                                self._on_change(booking)
+                            except Exception as e:
+                                print(f"❌ Live update error: {e}")
+            except OperationFailure as e:
+                self.active = False
+                if e.code in self.UNSUPPORTED_CODES or 'replica set' in str(e):
+                    self.unsupported = True
+                    print("ℹ️ Change streams unavailable, live updates use the in-process bus")
+                    return
+                print(f"❌ Change stream error: {e}")
+                time.sleep(1)
+            except PyMongoError as e:
+                self.active = False
+                print(f"❌ Change stream error: {e}")
+                time.sleep(1)
+            except Exception as e:
+                # Anything else (e.g. a client without watch()) won't fix itself
+                self.active = False
+                self.unsupported = True
+                print(f"❌ Change stream disabled: {e}")
+                return
+
+
+def sse_stream(bus, last_event_id=None, hall=None, heartbeat=15, max_seconds=None):
+    # text/event-stream body: one 'booking' event per delta, comments as
+    # keep-alives, and a 'reset' event whenever the client may have missed
+    # something (fell out of the buffer, or reconnected to another worker)
+    deadline = time.monotonic() + max_seconds if max_seconds else None
+    yield 'retry: 3000\n\n'
+    epoch, _, seq = (last_event_id or '').partition('-')
+    if epoch == bus.epoch and seq.isdigit():
+        last_id = int(seq)
+    else:
+        last_id = bus.last_id
+        if last_event_id:
+            yield f'id: {bus.epoch}-{last_id}\nevent: reset\ndata: {{}}\n\n'
+    while deadline is None or time.monotonic() < deadline:
+        timeout = heartbeat if deadline is None else max(min(heartbeat, deadline - time.monotonic()), 0)
+        events = bus.wait(last_id, timeout)
+        if events is None:
+            last_id = bus.last_id
+            yield f'id: {bus.epoch}-{last_id}\nevent: reset\ndata: {{}}\n\n'
+            continue
+        if not events:
+            yield ': ping\n\n'
+            continue
+        for event in events:
+            last_id = event['id']
+            if hall and event.get('hall') != hall:
+                continue
+            data = json.dumps(event, separators=(',', ':'))
+            yield f'id: {bus.epoch}-{last_id}\nevent: booking\ndata: {data}\n\n'
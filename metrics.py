@@ -0,0 +1,210 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+from pymongo import monitoring
+
+# Minimal Prometheus text-format metrics, kept in process memory. With
+# several gunicorn workers each worker reports its own numbers.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_str(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                     for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_label_str(self.labels, key)} {value}')
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text, labels=()):
+        self.name, self.help, self.labels = name, help_text, labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def set(self, value, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_label_str(self.labels, key)} {value}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels, self.buckets = name, help_text, labels, buckets
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][bisect_left(self.buckets, value)] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                    cumulative += bucket_count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    labels = _label_str(self.labels + ('le',), key + (le,))
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                lines.append(f'{self.name}_sum{_label_str(self.labels, key)} {total}')
+                lines.append(f'{self.name}_count{_label_str(self.labels, key)} {count}')
+        return lines
+
+
+http_requests = Counter('ciet_http_requests_total', 'HTTP requests by route and status',
+                        ('endpoint', 'method', 'status'))
+http_latency = Histogram('ciet_http_request_duration_seconds', 'HTTP request latency',
+                         ('endpoint', 'method'))
+http_db_time = Counter('ciet_http_request_db_seconds_total', 'Time requests spent in MongoDB commands',
+                       ('endpoint',))
+http_in_flight = Gauge('ciet_http_requests_in_flight', 'Requests currently being served')
+mongo_commands = Counter('ciet_mongo_commands_total', 'MongoDB commands by collection',
+                         ('collection', 'command'))
+mongo_failures = Counter('ciet_mongo_command_failures_total', 'Failed MongoDB commands',
+                         ('collection', 'command'))
+mongo_latency = Histogram('ciet_mongo_command_duration_seconds', 'MongoDB command latency',
+                          ('collection', 'command'))
+mongo_slow = Counter('ciet_mongo_slow_commands_total', 'MongoDB commands slower than the slow query threshold',
+                     ('collection', 'command'))
+
+jobs_finished = Counter('ciet_jobs_total', 'Background job attempts by job name and outcome',
+                        ('job', 'outcome'))
+job_latency = Histogram('ciet_job_duration_seconds', 'Background job run time', ('job',))
+
+REGISTRY = [http_requests, http_latency, http_db_time, http_in_flight,
+            mongo_commands, mongo_failures, mongo_latency, mongo_slow,
+            jobs_finished, job_latency]
+
+# Per-request accumulator for time spent in Mongo; thread-local (and
+# greenlet-local once gevent patches threading)
+_request_state = threading.local()
+
+
+def query_shape(value):
+    # Keep the structure of a filter, drop the values: {'hall': '?', ...}
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(v) for v in value[:3]]
+    return '?'
+
+
+class CommandMetrics(monitoring.CommandListener):
+    IGNORED = {'hello', 'ismaster', 'isMaster', 'ping', 'saslStart', 'saslContinue', 'endSessions'}
+
+    def __init__(self, slow_ms=100):
+        self.slow_ms = slow_ms
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        if event.command_name in self.IGNORED:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = event.command.get('collection', '-') if event.command_name == 'getMore' else '-'
+        shape = None
+        for key in ('filter', 'pipeline', 'updates', 'deletes', 'query'):
+            if key in event.command:
+                shape = query_shape(event.command[key])
+                break
+        with self._lock:
+            self._pending[event.request_id] = (collection, shape)
+
+    def _finish(self, event, failed):
+        with self._lock:
+            entry = self._pending.pop(event.request_id, None)
+        if entry is None:
+            return
+        collection, shape = entry
+        seconds = event.duration_micros / 1e6
+        mongo_commands.inc(collection, event.command_name)
+        mongo_latency.observe(seconds, collection, event.command_name)
+        if failed:
+            mongo_failures.inc(collection, event.command_name)
+        if getattr(_request_state, 'active', False):
+            _request_state.db_seconds += seconds
+        if seconds * 1000 >= self.slow_ms:
+            mongo_slow.inc(collection, event.command_name)
+            print(f"🐢 Slow query {seconds * 1000:.1f}ms {event.command_name} {collection} {shape}")
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+command_metrics = CommandMetrics()
+
+
+def init_app(app):
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+        _request_state.active = True
+        _request_state.db_seconds = 0.0
+        http_in_flight.inc(1)
+
+    @app.after_request
+    def _record(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            endpoint = request.endpoint or 'unmatched'
+            http_latency.observe(time.perf_counter() - start, endpoint, request.method)
+            http_requests.inc(endpoint, request.method, response.status_code)
+            http_db_time.inc(endpoint, amount=getattr(_request_state, 'db_seconds', 0.0))
+        return response
+
+    @app.teardown_request
+    def _done(exc):
+        if getattr(_request_state, 'active', False):
+            _request_state.active = False
+            http_in_flight.inc(-1)
+
+
+def render(extra_gauges=None):
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for name, (help_text, value) in (extra_gauges or {}).items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}']
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,69 @@
+import time
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from scheduling import typed_fields
+
+TYPED_DATES = 'typed-dates'
+
+
+def migrate_typed_dates(db, batch_size=1000, pause=0.0, limit=None, restart=False, progress=print):
+    # Backfill start/end/slotMask on bookings written before those fields
+    # existed. Walks the collection in _id order, one bulk_write per batch,
+    # and checkpoints the last _id in `migrations` so an interrupted run
+    # picks up where it stopped. `pause` seconds between batches keeps the
+    # load on a live primary down.
+    bookings = db['bookings']
+    if restart:
+        db['migrations'].delete_one({'_id': TYPED_DATES})
+    state = db['migrations'].find_one({'_id': TYPED_DATES}) or {}
+    last_id = state.get('lastId')
+    pending = {'start': {'$exists': False}}
+    total = bookings.count_documents(pending)
+    stats = {'updated': 0, 'skipped': 0, 'batches': 0, 'remaining': total}
+    if last_id:
+        progress(f"Resuming after {last_id}")
+    progress(f"{total} bookings without typed dates")
+    started = time.monotonic()
+
+    finished = False
+    while limit is None or stats['updated'] + stats['skipped'] < limit:
+        query = dict(pending, _id={'$gt': last_id}) if last_id else pending
+        size = batch_size if limit is None else min(batch_size, limit - stats['updated'] - stats['skipped'])
+        batch = list(bookings.find(query, {'date': 1, 'fromDate': 1, 'toDate': 1, 'time': 1})
+                     .sort('_id', 1).limit(size))
+        if not batch:
+            finished = True
+            break
+        operations = []
+        for booking in batch:
+            try:
+                fields = typed_fields(booking)
+            except (KeyError, TypeError, ValueError):
+                stats['skipped'] += 1
+                continue
+            # Guard on start so a concurrent write path isn't overwritten
+            operations.append(UpdateOne({'_id': booking['_id'], 'start': {'$exists': False}}, {'$set': fields}))
+        modified = bookings.bulk_write(operations, ordered=False).modified_count if operations else 0
+        stats['updated'] += modified
+        last_id = batch[-1]['_id']
+        stats['batches'] += 1
+        db['migrations'].update_one(
+            {'_id': TYPED_DATES},
+            {'$set': {'lastId': last_id, 'updatedAt': datetime.utcnow()}, '$inc': {'updated': modified}},
+            upsert=True
+        )
+
+        done = stats['updated'] + stats['skipped']
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        progress(f"  {done}/{total} ({rate:.0f}/s, eta {eta:.0f}s, {stats['skipped']} skipped)")
+        if pause:
+            time.sleep(pause)
+
+    stats['remaining'] = bookings.count_documents(pending)
+    if finished:
+        db['migrations'].update_one({'_id': TYPED_DATES}, {'$set': {'completedAt': datetime.utcnow()}}, upsert=True)
+    return stats
@@ -0,0 +1,43 @@
+import smtplib
+from email.message import EmailMessage
+
+from config import Config
+
+
+def send_email(to, subject, body):
+    # Plain-text mail through SMTP_HOST. Without one configured the message
+    # is only logged, so development setups don't need a mail server.
+    if not Config.SMTP_HOST:
+        print(f"✉️ (SMTP_HOST not set) to={to} subject={subject!r}")
+        return False
+    message = EmailMessage()
+    message['From'] = Config.SMTP_FROM
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    with smtplib.SMTP(Config.SMTP_HOST, Config.SMTP_PORT, timeout=Config.SMTP_TIMEOUT) as smtp:
+        if Config.SMTP_STARTTLS:
+            smtp.starttls()
+        if Config.SMTP_USERNAME:
+            smtp.login(Config.SMTP_USERNAME, Config.SMTP_PASSWORD)
+        smtp.send_message(message)
+    return True
+
+
+def decision_email(booking, user):
+    if booking.get('fromDate') and booking.get('toDate') and booking['fromDate'] != booking['toDate']:
+        when = f"{booking['fromDate']} to {booking['toDate']}"
+    else:
+        when = booking.get('fromDate') or booking.get('date')
+    if booking.get('recurrence'):
+        when += f" (repeats {booking['recurrence']['freq']})"
+    subject = f"Hall booking {booking['status'].lower()}: {booking['hall']} on {when}"
+    body = (
+        f"Dear {user.get('full_name') or user['username']},\n\n"
+        f"Your booking for {booking['hall']} ({booking.get('time')}) on {when} "
+        f"has been {booking['status'].lower()}.\n\n"
+        f"Purpose: {booking.get('purpose') or '-'}\n"
+        f"Department: {booking.get('department') or '-'}\n\n"
+        f"CIET Hall Booking System\n"
+    )
+    return subject, body
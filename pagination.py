@@ -0,0 +1,76 @@
+import base64
+import heapq
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+# Keyset pagination over (createdAt, _id), newest first. The cursor is the
+# sort key of the last item on the page, so every page is an index range
+# scan instead of an ever-growing skip().
+SORT_ORDER = [('createdAt', -1), ('_id', -1)]
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(doc):
+    created_at = doc.get('createdAt')
+    created = created_at.isoformat() if isinstance(created_at, datetime) else ''
+    raw = f"{created}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        created, _id = base64.urlsafe_b64decode(padded.encode()).decode().split('|', 1)
+        return (datetime.fromisoformat(created) if created else None), ObjectId(_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def after_cursor(cursor):
+    created_at, last_id = decode_cursor(cursor)
+    if created_at is None:
+        return {'createdAt': None, '_id': {'$lt': last_id}}
+    return {'$or': [
+        {'createdAt': {'$lt': created_at}},
+        {'createdAt': created_at, '_id': {'$lt': last_id}},
+        # Bookings without createdAt sort after every dated one
+        {'createdAt': None}
+    ]}
+
+
+def parse_fields(fields):
+    # ?fields=hall,date,status -> projection; _id is always returned
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    if not names:
+        return None
+    projection = {name: 1 for name in names if name != '_id'}
+    # createdAt is the pagination key, it has to come back for the cursor
+    projection['createdAt'] = 1
+    return projection
+
+
+def parse_limit(value, default=None, maximum=MAX_PAGE_SIZE):
+    if value in (None, ''):
+        return default
+    limit = int(value)
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, maximum)
+
+
+def sort_key(doc):
+    # SORT_ORDER as a Python key; bookings without createdAt sort last
+    created_at = doc.get('createdAt')
+    return (created_at is not None, created_at or datetime.min, doc['_id'])
+
+
+def merge_sorted(*cursors):
+    # Interleave cursors that are each already in SORT_ORDER (the hot and
+    # archive collections) into one stream in the same order
+    if len(cursors) == 1:
+        return cursors[0]
+    return heapq.merge(*cursors, key=sort_key, reverse=True)
@@ -0,0 +1,116 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+def _gevent_patched():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def _call_off_loop(fn, *args):
+    # Under gevent workers the pool "threads" are greenlets, and a bcrypt
+    # call would stall every request on the hub. Run it on gevent's real
+    # OS thread pool instead.
+    if _gevent_patched():
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args)
+    return fn(*args)
+
+
+class HasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    # bcrypt releases the GIL, so a small thread pool hashes in parallel
+    # while request threads just wait on the result. The pool is bounded:
+    # once `max_pending` jobs are queued or running, new ones are refused
+    # (HasherBusy) instead of piling up behind a login storm.
+
+    def __init__(self, rounds=12, workers=4, max_pending=32, timeout=10):
+        self.rounds = rounds
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.busy_time = 0.0
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy('Password service is busy, try again shortly')
+        with self._lock:
+            self.pending += 1
+
+        def run():
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.pending -= 1
+                    self.completed += 1
+                    self.busy_time += time.perf_counter() - start
+                self._slots.release()
+
+        try:
+            return self._executor.submit(run)
+        except Exception:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            raise
+
+    def hash(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._submit(_call_off_loop, bcrypt.hashpw, password.encode(), salt).result(timeout=self.timeout)
+
+    def verify(self, password, hashed):
+        return self._submit(_call_off_loop, bcrypt.checkpw, password.encode(), hashed).result(timeout=self.timeout)
+
+    def needs_rehash(self, hashed):
+        # $2b$12$... -> cost 12
+        try:
+            return int(hashed.split(b'$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def rehash_in_background(self, password, on_done):
+        # Upgrade an old hash after a successful login without delaying it
+        def rehash():
+            on_done(_call_off_loop(bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds=self.rounds)))
+            with self._lock:
+                self.rehashed += 1
+        try:
+            self._submit(rehash)
+        except HasherBusy:
+            pass  # try again on the next login
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rounds': self.rounds,
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'queue_depth': self.pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'rehashed': self.rehashed,
+                'busy_seconds': round(self.busy_time, 3)
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
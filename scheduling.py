@@ -0,0 +1,356 @@
+import heapq
+import math
+import os
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+DATE_FORMAT = '%Y-%m-%d'
+ACTIVE_STATUSES = ['Pending', 'Approved']
+
+# Which stored 'time' values collide with a requested slot
+SLOT_CONFLICTS = {
+    'FN': ['FN', 'Full'],
+    'AN': ['AN', 'Full'],
+    'Full': ['FN', 'AN', 'Full']
+}
+
+# Longest range a single booking may span. Bounding it lets the conflict
+# query put a lower limit on fromDate, so the index scan only walks
+# bookings that could possibly reach the requested range.
+MAX_BOOKING_DAYS = int(os.getenv('MAX_BOOKING_DAYS', 180))
+# Recurring series may run longer (a whole academic year)
+MAX_SERIES_DAYS = int(os.getenv('MAX_SERIES_DAYS', 366))
+
+
+def parse_date(value):
+    return datetime.strptime(value, DATE_FORMAT)
+
+
+def format_date(value):
+    return value.strftime(DATE_FORMAT)
+
+
+def parse_request_range(data):
+    # Support legacy 'date' field or new 'fromDate'/'toDate'
+    if data.get('fromDate') and data.get('toDate'):
+        req_from = parse_date(data.get('fromDate'))
+        req_to = parse_date(data.get('toDate'))
+    else:
+        single_date = parse_date(data.get('date') or data.get('fromDate'))
+        req_from = single_date
+        req_to = single_date
+    return req_from, req_to
+
+
+def booking_range(booking):
+    # Typed start/end when present (no strptime), else the date strings:
+    # multi-day bookings carry fromDate/toDate, legacy ones only 'date'.
+    # For a recurring series this is its first to last occurrence.
+    if isinstance(booking.get('start'), datetime) and isinstance(booking.get('end'), datetime):
+        return booking['start'], booking['end']
+    if booking.get('fromDate') and booking.get('toDate'):
+        return parse_date(booking['fromDate']), parse_date(booking['toDate'])
+    single_date = parse_date(booking['date'])
+    return single_date, single_date
+
+
+# =============== TYPED FIELDS ===============
+# Alongside the date strings every booking stores:
+#   start, end  datetimes (midnight) of its first and last day
+#   slotMask    FN=1, AN=2, Full=3
+# so range queries compare BSON dates on one index instead of strings
+# across three shapes. Written on insert; older documents are backfilled
+# by migrations.migrate_typed_dates().
+
+SLOT_BITS = {'FN': 1, 'AN': 2}
+
+
+def slot_mask(time_slot):
+    mask = 0
+    for slot in SLOT_PARTS.get(time_slot, SLOT_PARTS['Full']):
+        mask |= SLOT_BITS[slot]
+    return mask
+
+
+def typed_fields(booking):
+    b_from, b_to = booking_range(booking)
+    return {'start': b_from, 'end': b_to, 'slotMask': slot_mask(booking.get('time'))}
+
+
+def overlapping_masks(time_slot):
+    # Stored slotMask values that share a half-day with `time_slot`
+    mask = slot_mask(time_slot)
+    return [m for m in (1, 2, 3) if m & mask]
+
+
+def ends_on_or_after(day):
+    # $or clauses for bookings still running on or after `day`
+    day_str = format_date(day)
+    return [
+        {'end': {'$gte': day}},
+        {'start': None, 'toDate': {'$gte': day_str}},
+        {'start': None, 'fromDate': None, 'date': {'$gte': day_str}}
+    ]
+
+
+# =============== RECURRING SERIES ===============
+# A series is one booking document with a 'recurrence' sub-document:
+#   {'freq': 'weekly', 'interval': 1, 'byweekday': [4], 'start': '2026-07-03',
+#    'until': '2026-11-27', 'exdates': ['2026-08-15']}
+# Internally every booking (plain or recurring) is a set of arithmetic
+# progressions of day ordinals (first, period, last) plus excluded days,
+# so overlaps between any two bookings are solved with modular arithmetic
+# instead of listing their occurrences.
+
+WEEKDAY_CODES = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+def normalize_recurrence(raw, start):
+    # Shape first: anything malformed is a ValueError (a 400), never a crash
+    if not isinstance(raw, dict):
+        raise ValueError('recurrence must be an object')
+    for key in ('byweekday', 'exdates'):
+        if key in raw and not isinstance(raw[key], list):
+            raise ValueError(f'recurrence.{key} must be a list')
+    if not all(isinstance(d, str) for d in raw.get('exdates', [])):
+        raise ValueError('recurrence.exdates must be YYYY-MM-DD dates')
+    freq = str(raw.get('freq', 'weekly')).lower()
+    if freq not in ('daily', 'weekly'):
+        raise ValueError('recurrence.freq must be daily or weekly')
+    try:
+        interval = int(raw.get('interval', 1))
+    except (TypeError, ValueError):
+        raise ValueError('recurrence.interval must be a whole number')
+    if interval < 1:
+        raise ValueError('recurrence.interval must be at least 1')
+    if not raw.get('until'):
+        raise ValueError('recurrence.until is required')
+    if not isinstance(raw['until'], str):
+        raise ValueError('recurrence.until must be a YYYY-MM-DD date')
+    until = parse_date(raw['until'])
+    if until < start:
+        raise ValueError('recurrence.until cannot be before the start date')
+    if (until - start).days >= MAX_SERIES_DAYS:
+        raise ValueError(f'A recurring series cannot span more than {MAX_SERIES_DAYS} days')
+    byweekday = []
+    if freq == 'weekly':
+        for day in raw.get('byweekday') or [start.weekday()]:
+            if isinstance(day, str) and day.upper()[:2] in WEEKDAY_CODES:
+                day = WEEKDAY_CODES.index(day.upper()[:2])
+            if isinstance(day, bool) or not isinstance(day, int) or not 0 <= day <= 6:
+                raise ValueError('recurrence.byweekday must be 0-6 (Monday-Sunday)')
+            byweekday.append(day)
+    exdates = sorted({format_date(parse_date(d)) for d in raw.get('exdates', [])})
+    return {
+        'freq': freq,
+        'interval': interval,
+        'byweekday': sorted(set(byweekday)),
+        'start': format_date(start),
+        'until': format_date(until),
+        'exdates': exdates
+    }
+
+
+def progressions(booking):
+    recurrence = booking.get('recurrence')
+    if not recurrence:
+        b_from, b_to = booking_range(booking)
+        return [(b_from.toordinal(), 1, b_to.toordinal())], frozenset()
+    start = parse_date(recurrence['start']).toordinal()
+    until = parse_date(recurrence['until']).toordinal()
+    excluded = frozenset(parse_date(d).toordinal() for d in recurrence.get('exdates', []))
+    interval = recurrence.get('interval', 1)
+    if recurrence['freq'] == 'daily':
+        return [(start, interval, until)], excluded
+    # Weekly: weeks start on Monday and every `interval`-th week counts,
+    # starting with the week that contains the start date (RRULE WKST=MO)
+    period = 7 * interval
+    monday = start - datetime.fromordinal(start).weekday()
+    result = []
+    for weekday in recurrence['byweekday']:
+        first = monday + weekday
+        if first < start:
+            first += period
+        if first <= until:
+            result.append((first, period, until))
+    return result, excluded
+
+
+def occurrence_dates(booking):
+    prog, excluded = progressions(booking)
+    streams = [range(first, last + 1, period) for first, period, last in prog]
+    previous = None
+    for ordinal in heapq.merge(*streams):
+        if ordinal != previous and ordinal not in excluded:
+            yield datetime.fromordinal(ordinal)
+        previous = ordinal
+
+
+def _first_common(a, b, excluded):
+    (f1, p1, l1), (f2, p2, l2) = a, b
+    g = math.gcd(p1, p2)
+    if (f2 - f1) % g:
+        return None
+    # Solve f1 + p1*t == f2 (mod p2) for t (Chinese remainder theorem)
+    m = p2 // g
+    t = ((f2 - f1) // g) * pow(p1 // g, -1, m) % m if m > 1 else 0
+    x = f1 + p1 * t
+    step = p1 // g * p2
+    low, high = max(f1, f2), min(l1, l2)
+    if x < low:
+        x += -(-(low - x) // step) * step
+    # Only excluded dates can push us past the first solution
+    while x <= high:
+        if x not in excluded:
+            return x
+        x += step
+    return None
+
+
+def first_common_date(a, b):
+    # Earliest day both bookings occupy, or None
+    prog_a, ex_a = progressions(a)
+    prog_b, ex_b = progressions(b)
+    excluded = ex_a | ex_b
+    best = None
+    for pa in prog_a:
+        for pb in prog_b:
+            x = _first_common(pa, pb, excluded)
+            if x is not None and (best is None or x < best):
+                best = x
+    return datetime.fromordinal(best) if best is not None else None
+
+
+def overlap_clauses(req_from, req_to, req_time=None):
+    # (StartA <= EndB) and (EndA >= StartB). Typed documents are served by
+    # the hall/status/slotMask/start/end index; the 'start': None clauses
+    # cover documents the typed-dates migration hasn't reached yet.
+    typed_slot, legacy_slot = {}, {}
+    if req_time is not None:
+        typed_slot = {'slotMask': {'$in': overlapping_masks(req_time)}}
+        legacy_slot = {'time': {'$in': SLOT_CONFLICTS.get(req_time, SLOT_CONFLICTS['Full'])}}
+    from_str = format_date(req_from)
+    to_str = format_date(req_to)
+    lower_bound = req_from - timedelta(days=MAX_BOOKING_DAYS)
+    return [
+        dict(typed_slot, start={'$gte': lower_bound, '$lte': req_to}, end={'$gte': req_from}),
+        # Recurring series can start before the lower bound
+        dict(typed_slot, recurrence={'$exists': True}, start={'$lte': req_to}, end={'$gte': req_from}),
+        dict(legacy_slot, start=None, fromDate={'$gte': format_date(lower_bound), '$lte': to_str},
+             toDate={'$gte': from_str}),
+        dict(legacy_slot, start=None, recurrence={'$exists': True}, fromDate={'$lte': to_str},
+             toDate={'$gte': from_str}),
+        # Legacy single-day bookings without fromDate
+        dict(legacy_slot, start=None, fromDate=None, date={'$gte': from_str, '$lte': to_str})
+    ]
+
+
+def conflict_query(hall, req_from, req_to, req_time, statuses=None):
+    return {
+        'hall': hall,
+        'status': {'$in': statuses or ACTIVE_STATUSES},
+        '$or': overlap_clauses(req_from, req_to, req_time)
+    }
+
+
+def find_conflict(bookings, hall, req_from, req_to, req_time, exclude_id=None, statuses=None, request=None):
+    # `request` is the booking being checked; only needed when it recurs
+    query = conflict_query(hall, req_from, req_to, req_time, statuses=statuses)
+    if exclude_id is not None:
+        query['_id'] = {'$ne': exclude_id}
+    recurring = bool(request and request.get('recurrence'))
+    if not recurring:
+        request = {'start': req_from, 'end': req_to}
+    for candidate in bookings.find(query):
+        # Plain ranges that match the query overlap by construction
+        if not recurring and not candidate.get('recurrence'):
+            return candidate
+        if first_common_date(request, candidate):
+            return candidate
+    return None
+
+
+def conflict_message(booking):
+    b_from, b_to = booking_range(booking)
+    if booking.get('recurrence'):
+        return (f"Conflict detected! Hall has a recurring {booking['recurrence']['freq']} booking "
+                f"from {b_from.date()} to {b_to.date()} ({booking.get('time')}).")
+    return f"Conflict detected! Hall is already booked from {b_from.date()} to {b_to.date()} ({booking.get('time')})."
+
+
+# =============== SLOT RESERVATION ===============
+# Every active booking owns one claim document per (hall, date, slot) it
+# occupies. A unique index on those three fields lets MongoDB arbitrate
+# concurrent submissions: whichever insert lands first wins, the other gets
+# a duplicate key error and rolls back the claims it already made.
+
+SLOT_PARTS = {
+    'FN': ['FN'],
+    'AN': ['AN'],
+    'Full': ['FN', 'AN']
+}
+
+
+def booking_cells(booking):
+    # Every (hall, date, slot) an existing booking occupies
+    slots = SLOT_PARTS.get(booking.get('time'), SLOT_PARTS['Full'])
+    cells = []
+    for day in occurrence_dates(booking):
+        date_str = format_date(day)
+        cells.extend((booking['hall'], date_str, slot) for slot in slots)
+    return cells
+
+
+def claim_documents(booking):
+    # Sorted (date, slot) order keeps concurrent claimers from both failing
+    return [
+        {'hall': hall, 'date': date_str, 'slot': slot, 'bookingId': booking['_id']}
+        for hall, date_str, slot in booking_cells(booking)
+    ]
+
+
+def claim_slots(db, booking):
+    claims = db['slot_claims']
+    if claims.find_one({'bookingId': booking['_id']}, {'_id': 1}):
+        return None
+    docs = claim_documents(booking)
+    try:
+        claims.insert_many(docs, ordered=True)
+    except (BulkWriteError, DuplicateKeyError) as e:
+        claims.delete_many({'bookingId': booking['_id']})
+        details = getattr(e, 'details', None) or {}
+        errors = details.get('writeErrors') or [{}]
+        failed = docs[errors[0].get('index', 0)]
+        return failed
+    return None
+
+
+def release_slots(db, booking_id):
+    db['slot_claims'].delete_many({'bookingId': booking_id})
+
+
+def reserve_booking(db, booking_doc, req_from, req_to):
+    # 1. Cheap indexed check first, so the common conflict gets a precise message
+    bookings = db['bookings']
+    hall = booking_doc['hall']
+    req_time = booking_doc['time']
+    conflict = find_conflict(bookings, hall, req_from, req_to, req_time, request=booking_doc)
+    if conflict:
+        return None, conflict_message(conflict)
+
+    # 2. Atomically claim every (hall, date, slot); losing a race fails here
+    booking_doc.setdefault('_id', ObjectId())
+    booking_doc.update(typed_fields(booking_doc))
+    taken = claim_slots(db, booking_doc)
+    if taken:
+        return None, f"Conflict detected! Hall is already booked on {taken['date']} ({taken['slot']})."
+
+    # 3. Claims held, write the booking itself
+    try:
+        bookings.insert_one(booking_doc)
+    except Exception:
+        release_slots(db, booking_doc['_id'])
+        raise
+    return booking_doc['_id'], None
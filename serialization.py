@@ -0,0 +1,81 @@
+import json
+from datetime import date, datetime, timezone
+
+from bson.objectid import ObjectId
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# One JSON encoder for every API response. MongoDB documents go out as
+# they come from the driver: ObjectId becomes its hex string and datetimes
+# become ISO 8601, so routes don't copy each document just to fix `_id`.
+# Naive datetimes (what pymongo returns) are UTC and are marked as such,
+# otherwise browsers would read them as local time.
+#
+# orjson does the work when installed; the stdlib fallback produces the
+# same output, only slower.
+#
+# Bookings' typed start/end are the exception: they are calendar days
+# stored as naive local midnights, not UTC instants, so calendar_days()
+# turns them back into YYYY-MM-DD before they reach the encoder.
+
+DATE_ONLY_FIELDS = ('start', 'end')
+
+
+def _default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return obj.isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def calendar_days(doc):
+    for key in DATE_ONLY_FIELDS:
+        value = doc.get(key)
+        if isinstance(value, datetime):
+            doc[key] = value.strftime('%Y-%m-%d')
+    return doc
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj):
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(default=_default, ensure_ascii=False, separators=(',', ':'))
+
+    def dumps(obj):
+        # The stdlib encoder only calls default() for types it doesn't know,
+        # and datetime is one of them, so output matches orjson's
+        return _encoder.encode(obj).encode()
+
+    loads = json.loads
+
+
+class FastJSONProvider(JSONProvider):
+    # app.json for jsonify(), request.get_json() and app.json.dumps()
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Bytes straight into the response, no str round trip
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
@@ -0,0 +1,61 @@
+# Local SMTP stand-in for development and tests: accepts every message and
+# prints it instead of delivering it.
+#
+#   python smtp_sink.py                  # listens on localhost:1025
+#   SMTP_HOST=localhost SMTP_PORT=1025 python app.py
+import os
+import socketserver
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.reply('220 smtp-sink ready')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 smtp-sink')
+            elif verb == 'MAIL':
+                sender, recipients = command[10:], []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command[8:])
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data.decode('utf-8', 'replace').rstrip('\r\n'))
+                print(f"---------- from {sender} to {', '.join(recipients)} ----------")
+                print('\n'.join(lines))
+                self.reply('250 OK: queued')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+if __name__ == '__main__':
+    host = os.getenv('SMTP_SINK_HOST', 'localhost')
+    port = int(os.getenv('SMTP_SINK_PORT', 1025))
+    with SMTPSink((host, port), SMTPHandler) as server:
+        print(f"✉️ SMTP sink listening on {host}:{port}")
+        server.serve_forever()
@@ -0,0 +1,52 @@
+# Route and scheduling tests against an in-process mongomock database, so
+# they run without a mongod:
+#
+#   pip install pytest mongomock
+#   python -m pytest -q
+import os
+import sys
+
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MONGO_DB_NAME', 'ciet_hall_booking_test')
+os.environ['ARCHIVE_INTERVAL_HOURS'] = '0'
+os.environ.setdefault('JWT_SECRET_KEY', 'test-secret-key-at-least-32-bytes-long')
+
+import config
+
+config._client = mongomock.MongoClient()
+config._client_pid = os.getpid()
+
+import app as app_module
+
+
+@pytest.fixture
+def db():
+    config._client.drop_database(config.Config.MONGO_DB_NAME)
+    database = config.get_database()
+    config.ensure_indexes(database)
+    for cache in (app_module.user_auth_cache, app_module.stats_cache, app_module.calendar_feed_cache):
+        cache.clear()
+    app_module.availability_index.invalidate()
+    app_module.asset_catalog.invalidate()
+    app_module.seed_assets()
+    return database
+
+
+@pytest.fixture
+def client(db):
+    return app_module.app.test_client()
+
+
+@pytest.fixture
+def headers(db):
+    def make(username='admin', role='administrator'):
+        user = {'username': username, 'role': role, 'email': f'{username}@ciet.edu', 'full_name': username}
+        db['users'].update_one({'username': username}, {'$set': user}, upsert=True)
+        with app_module.app.app_context():
+            token = app_module.issue_token(user)
+        return {'Authorization': f'Bearer {token}'}
+    return make
@@ -0,0 +1,203 @@
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+import app as app_module
+from archival import acquire_lock, archive_bookings, release_lock
+from scheduling import claim_slots, first_common_date, normalize_recurrence, parse_date
+
+
+def book(client, headers, **fields):
+    body = dict({'hall': 'Board Room', 'date': '2030-01-10', 'time': 'FN', 'seats': 10, 'dept': 'CSE'}, **fields)
+    return client.post('/book', json=body, headers=headers)
+
+
+def claims_of(db, booking_id):
+    return sorted((c['date'], c['slot']) for c in db['slot_claims'].find({'bookingId': ObjectId(booking_id)}))
+
+
+def status_of(db, booking_id):
+    return db['bookings'].find_one({'_id': ObjectId(booking_id)})['status']
+
+
+# =============== SLOT CLAIMS ===============
+
+def test_booking_claims_its_slots(client, db, headers):
+    response = book(client, headers(), fromDate='2030-01-10', toDate='2030-01-11', time='Full')
+    assert response.status_code == 201
+    assert claims_of(db, response.json['id']) == [
+        ('2030-01-10', 'AN'), ('2030-01-10', 'FN'), ('2030-01-11', 'AN'), ('2030-01-11', 'FN')
+    ]
+
+
+def test_taken_slot_is_refused(client, db, headers):
+    assert book(client, headers()).status_code == 201
+    response = book(client, headers(), time='Full')
+    assert response.status_code == 400
+    assert 'Conflict' in response.json['message']
+    assert db['slot_claims'].count_documents({}) == 1
+    assert book(client, headers(), time='AN').status_code == 201
+
+
+def test_invalid_time_is_refused(client, db, headers):
+    response = book(client, headers(), time='bogus')
+    assert response.status_code == 400
+    assert db['slot_claims'].count_documents({}) == 0
+
+
+def test_losing_claim_rolls_back(db):
+    db['slot_claims'].insert_one({'hall': 'Board Room', 'date': '2030-01-11', 'slot': 'FN', 'bookingId': ObjectId()})
+    booking = {'_id': ObjectId(), 'hall': 'Board Room', 'fromDate': '2030-01-10', 'toDate': '2030-01-12',
+               'time': 'FN'}
+    taken = claim_slots(db, booking)
+    assert (taken['date'], taken['slot']) == ('2030-01-11', 'FN')
+    assert db['slot_claims'].count_documents({'bookingId': booking['_id']}) == 0
+
+
+# =============== DECISIONS ===============
+
+def test_reject_releases_claims(client, db, headers):
+    booking_id = book(client, headers()).json['id']
+    assert client.post(f'/reject/{booking_id}', headers=headers()).status_code == 200
+    assert claims_of(db, booking_id) == []
+    assert book(client, headers()).status_code == 201
+
+
+def test_approve_keeps_claims(client, db, headers):
+    booking_id = book(client, headers()).json['id']
+    assert client.post(f'/approve/{booking_id}', headers=headers()).status_code == 200
+    assert status_of(db, booking_id) == 'Approved'
+    assert claims_of(db, booking_id) == [('2030-01-10', 'FN')]
+
+
+def test_reapprove_rejected_reclaims(client, db, headers):
+    booking_id = book(client, headers()).json['id']
+    client.post(f'/reject/{booking_id}', headers=headers())
+    assert client.post(f'/approve/{booking_id}', headers=headers()).status_code == 200
+    assert status_of(db, booking_id) == 'Approved'
+    assert claims_of(db, booking_id) == [('2030-01-10', 'FN')]
+
+
+def test_reapprove_after_slot_taken(client, db, headers):
+    first = book(client, headers()).json['id']
+    client.post(f'/reject/{first}', headers=headers())
+    second = book(client, headers()).json['id']
+    assert client.post(f'/approve/{first}', headers=headers()).status_code == 409
+    assert status_of(db, first) == 'Rejected'
+    assert claims_of(db, first) == []
+    assert claims_of(db, second) == [('2030-01-10', 'FN')]
+
+
+def test_reapprove_against_legacy_booking_leaks_no_claims(client, db, headers):
+    booking_id = book(client, headers()).json['id']
+    client.post(f'/reject/{booking_id}', headers=headers())
+    # Approved before slot claims existed: no claim rows of its own
+    db['bookings'].insert_one({'hall': 'Board Room', 'date': '2030-01-10', 'time': 'Full', 'status': 'Approved'})
+    assert client.post(f'/approve/{booking_id}', headers=headers()).status_code == 409
+    assert status_of(db, booking_id) == 'Rejected'
+    assert claims_of(db, booking_id) == []
+
+
+def test_bulk_decisions(client, db, headers):
+    approve = book(client, headers()).json['id']
+    reject = book(client, headers(), time='AN').json['id']
+    response = client.post('/bookings/decisions', headers=headers(), json={'decisions': [
+        {'id': approve, 'action': 'approve'},
+        {'id': reject, 'action': 'reject'},
+        {'id': approve, 'action': 'reject'},
+        {'action': 'approve'}
+    ]})
+    assert response.status_code == 200
+    assert [r['status'] for r in response.json['results']] == ['approved', 'rejected', 'error', 'error']
+    assert response.json['results'][3]['message'] == 'Invalid booking id'
+    assert status_of(db, approve) == 'Approved'
+    assert claims_of(db, reject) == []
+
+
+def test_decisions_need_an_object(client, headers):
+    assert client.post('/bookings/decisions', headers=headers(), json=[]).status_code == 400
+
+
+# =============== RECURRING SERIES ===============
+
+def test_series_overlap():
+    start = parse_date('2030-01-07')  # Monday
+    mondays = {'recurrence': normalize_recurrence({'until': '2030-03-31', 'byweekday': ['MO']}, start)}
+    fortnightly = {'recurrence': normalize_recurrence(
+        {'until': '2030-03-31', 'byweekday': ['MO', 'WE'], 'interval': 2, 'exdates': ['2030-01-07']}, start)}
+    wednesdays = {'recurrence': normalize_recurrence({'until': '2030-03-31', 'byweekday': ['WE']}, start)}
+    assert first_common_date(mondays, fortnightly) == datetime(2030, 1, 21)
+    assert first_common_date(mondays, wednesdays) is None
+
+
+def test_series_conflicts_only_on_its_days(client, headers):
+    series = {'freq': 'weekly', 'until': '2030-03-31', 'byweekday': ['MO'], 'exdates': ['2030-01-14']}
+    assert book(client, headers(), date='2030-01-07', recurrence=series).status_code == 201
+    assert book(client, headers(), date='2030-01-21').status_code == 400
+    assert book(client, headers(), date='2030-01-14').status_code == 201
+    assert book(client, headers(), date='2030-01-22').status_code == 201
+
+
+def test_malformed_series_is_refused(client, headers):
+    for recurrence in ('weekly', {'until': '2030-03-31', 'exdates': None}, {'until': '2030-03-31', 'interval': None}):
+        assert book(client, headers(), recurrence=recurrence).status_code == 400
+
+
+# =============== KEYSET PAGES ===============
+
+def test_cursor_pages_cover_every_booking_once(client, headers):
+    for day in range(10, 17):
+        book(client, headers(), date=f'2030-01-{day}')
+    everything = [b['_id'] for b in client.get('/bookings', headers=headers()).json['items']]
+    paged, cursor = [], None
+    while True:
+        url = '/bookings?limit=3' + (f'&cursor={cursor}' if cursor else '')
+        body = client.get(url, headers=headers()).json
+        paged.extend(b['_id'] for b in body['items'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+    assert len(everything) == 7
+    assert paged == everything
+
+
+def test_bad_cursor_is_refused(client, headers):
+    assert client.get('/bookings?limit=3&cursor=nope', headers=headers()).status_code == 400
+
+
+# =============== ARCHIVAL ===============
+
+def test_archival_moves_ended_bookings_and_their_claims(client, db, headers):
+    old = book(client, headers(), date='2020-01-10').json['id']
+    current = book(client, headers()).json['id']
+    stats = archive_bookings(db, parse_date('2021-01-01'), progress=lambda message: None)
+    assert stats['archived'] == 1
+    assert db['bookings'].find_one({'_id': ObjectId(old)}) is None
+    assert db['bookings_archive'].find_one({'_id': ObjectId(old)})['status'] == 'Pending'
+    assert claims_of(db, old) == []
+    assert claims_of(db, current) == [('2030-01-10', 'FN')]
+
+
+def test_archival_overwrites_stale_copy(client, db, headers):
+    booking_id = book(client, headers(), date='2020-01-10').json['id']
+    db['bookings_archive'].insert_one(dict(db['bookings'].find_one({'_id': ObjectId(booking_id)})))
+    client.post(f'/approve/{booking_id}', headers=headers())
+    archive_bookings(db, parse_date('2021-01-01'), progress=lambda message: None)
+    assert db['bookings_archive'].find_one({'_id': ObjectId(booking_id)})['status'] == 'Approved'
+
+
+def test_one_archiver_at_a_time(client, db, headers):
+    book(client, headers(), date='2020-01-10')
+    assert acquire_lock(db, lease_seconds=60)
+    stats = archive_bookings(db, parse_date('2021-01-01'), progress=lambda message: None)
+    assert stats['locked'] and stats['archived'] == 0
+    release_lock(db)
+    assert archive_bookings(db, parse_date('2021-01-01'), progress=lambda message: None)['archived'] == 1
+
+
+def test_include_archived_listing(client, db, headers):
+    book(client, headers(), date='2020-01-10')
+    book(client, headers())
+    app_module.run_archival(days=30, progress=lambda message: None)
+    assert len(client.get('/bookings', headers=headers()).json['items']) == 1
+    assert len(client.get('/bookings?include_archived=1', headers=headers()).json['items']) == 2